@@ -16,8 +16,8 @@ def create_app(config_class=Config):
 
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+        from app.models import get_principal
+        return get_principal(int(user_id))  # Utilisateur et rôle en une requête, puis en mémoire
 
     # Enregistrer tous les blueprints
     for blueprint in blueprints:
@@ -1,11 +1,16 @@
-from .user import User, ajoute_user, supprime_user, maj_user, get_user_by_username, user_exists, get_user_by_id
-from .server import Server, server_exist, ajoute_server, host_up, get_server_by_name, get_server_by_id, is_ipv4_valide, supprime_serv, modif_server, ip_in_use
+from .user import User, ajoute_user, supprime_user, maj_user, get_user_by_username, user_exists, get_user_by_id, UsersVersion, Principal, get_principal, invalide_principal
+from .server import Server, ServersVersion, ServeurInfo, server_exist, ajoute_server, host_up, get_server_by_name, get_server_by_id, get_all_servers, get_servers_by_ids, is_ipv4_valide, supprime_serv, modif_server, ip_in_use
 from .role import Role, PRIVILEGE_CONSULTATION, PRIVILEGE_GESTION_SERVEURS, PRIVILEGE_ADMIN_USERS
+from .log_line import LogLine, LogToken, ajoute_lignes, recherche_lignes, page_lignes, get_dernieres_lignes, iter_lignes_serveur, get_derniers_timestamps, purge_lignes
+from .server_status import ServerStatus, maj_statuts, get_statuts
 
 __all__ = [
     'User', 'ajoute_user', 'supprime_user', 'maj_user', 'get_user_by_username', 'user_exists', 'get_user_by_id',
-    'Server', 'ajoute_server', "server_exist", "host_up", "get_server_by_name", "get_server_by_id", "is_ipv4_valide", "supprime_serv", "modif_server", "ip_in_use",
-    'Role', 'PRIVILEGE_CONSULTATION', 'PRIVILEGE_GESTION_SERVEURS', 'PRIVILEGE_ADMIN_USERS'
+    'UsersVersion', 'Principal', 'get_principal', 'invalide_principal',
+    'Server', 'ServersVersion', 'ServeurInfo', "get_all_servers", "get_servers_by_ids", 'ajoute_server', "server_exist", "host_up", "get_server_by_name", "get_server_by_id", "is_ipv4_valide", "supprime_serv", "modif_server", "ip_in_use",
+    'Role', 'PRIVILEGE_CONSULTATION', 'PRIVILEGE_GESTION_SERVEURS', 'PRIVILEGE_ADMIN_USERS',
+    'LogLine', 'LogToken', 'ajoute_lignes', 'recherche_lignes', 'page_lignes', 'get_dernieres_lignes', 'iter_lignes_serveur', 'get_derniers_timestamps', 'purge_lignes',
+    'ServerStatus', 'maj_statuts', 'get_statuts'
     ]
 
 """  
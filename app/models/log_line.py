@@ -0,0 +1,249 @@
+from app.extensions import db
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, BigInteger, String, Text, DateTime, ForeignKey, Index, insert, select, delete, func, tuple_
+from sqlalchemy.dialects import mysql
+from datetime import datetime
+from app.services.recherche import tokenise, corps_ligne, TAILLE_MAX_JETON
+
+# DATETIME(6) sous MariaDB pour conserver les microsecondes des timestamps syslog
+Horodatage = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql", "mariadb")
+
+TAILLE_LOT = 1000  # Nombre de lignes par INSERT groupé
+TAILLE_PAGE_MAX = 500  # Nombre maximum de lignes renvoyées par page
+PLAFOND_FREQUENCE = 10000  # Occurrences comptées au plus par jeton pour choisir le plus rare
+
+
+class LogLine(db.Model):
+    """Modèle ORM de la table 'log_lines' : lignes de syslog collectées en arrière-plan."""
+    __tablename__ = "log_lines"
+    __table_args__ = (
+        Index("ix_log_lines_server_ts", "server_id", "timestamp"),
+        Index("ix_log_lines_ts", "timestamp", "server_id", "id"),  # Pagination par clé (timestamp, serveur, id)
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    server_id: Mapped[int] = mapped_column(Integer, ForeignKey('servers.id', ondelete="CASCADE"), nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(Horodatage, nullable=False)
+    line: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+class LogToken(db.Model):
+    """Modèle ORM de la table 'log_tokens' : index inversé jeton -> lignes de log."""
+    __tablename__ = "log_tokens"
+
+    token: Mapped[str] = mapped_column(String(TAILLE_MAX_JETON), primary_key=True)
+    line_id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), ForeignKey('log_lines.id', ondelete="CASCADE"), primary_key=True
+    )
+
+
+def _insere_lot(server_id: int, lot: list):
+    """Insère un lot de lignes puis leurs jetons dans l'index inversé."""
+    # Le collecteur est le seul à écrire : les lignes du lot sont celles d'ID supérieur au maximum actuel
+    # (maximum de la clé primaire, lu directement dans l'index)
+    dernier_id = db.session.execute(select(func.max(LogLine.id))).scalar() or 0
+    db.session.execute(insert(LogLine), lot)
+
+    inserees = db.session.execute(
+        select(LogLine.id, LogLine.line).where(LogLine.server_id == server_id, LogLine.id > dernier_id)
+    )
+    jetons = [
+        {"token": jeton, "line_id": line_id}
+        for line_id, line in inserees
+        for jeton in tokenise(corps_ligne(line))
+    ]
+    for i in range(0, len(jetons), TAILLE_LOT * 10):
+        db.session.execute(insert(LogToken), jetons[i:i + TAILLE_LOT * 10])
+
+
+def ajoute_lignes(server_id: int, records) -> int:
+    """
+    Insère en masse des lignes de log pour un serveur, par lots, et les indexe.
+
+    :param server_id: ID du serveur
+    :param records: Itérable de LogRecord
+    :return: Nombre de lignes insérées
+    """
+    total = 0
+    lot = []
+    for record in records:
+        lot.append({"server_id": server_id, "timestamp": record.timestamp, "line": record.line})
+        if len(lot) >= TAILLE_LOT:
+            _insere_lot(server_id, lot)
+            total += len(lot)
+            lot = []
+    if lot:
+        _insere_lot(server_id, lot)
+        total += len(lot)
+    db.session.commit()
+    return total
+
+
+def _frequence(jeton: str) -> int:
+    """Nombre d'occurrences d'un jeton dans l'index, compté au plus jusqu'à PLAFOND_FREQUENCE."""
+    occurrences = select(LogToken.line_id).where(LogToken.token == jeton).limit(PLAFOND_FREQUENCE).subquery()
+    return db.session.execute(select(func.count()).select_from(occurrences)).scalar()
+
+
+def recherche_lignes(jetons: set, phrases: list = (), server_ids: list = None,
+                     debut: datetime = None, fin: datetime = None, k: int = 100) -> list:
+    """
+    Recherche les k lignes les plus récemment collectées contenant tous les jetons (et toutes les phrases).
+
+    La recherche part du jeton le plus rare : ses occurrences sont parcourues par
+    line_id décroissant, page par page, et seules les lignes de la page sont
+    vérifiées pour les autres jetons, les filtres et les phrases. Le coût dépend
+    donc du nombre de résultats demandés, et non du nombre d'occurrences des
+    termes fréquents.
+
+    :param jetons: Jetons devant tous être présents (voir analyse_requete)
+    :param phrases: Phrases exactes en minuscules, vérifiées sur les lignes candidates
+    :param server_ids: Restreint la recherche à ces serveurs (IDs entiers)
+    :param debut: Date minimale (incluse)
+    :param fin: Date maximale (incluse)
+    :param k: Nombre maximum de résultats
+    :return: Liste de tuples (server_id, timestamp, line), du plus récent au plus ancien
+    """
+    if not jetons:
+        return []
+
+    pivot, *autres = sorted(jetons, key=_frequence)
+
+    lignes = select(LogLine.id, LogLine.server_id, LogLine.timestamp, LogLine.line)
+    if server_ids:
+        lignes = lignes.where(LogLine.server_id.in_(server_ids))
+    if debut:
+        lignes = lignes.where(LogLine.timestamp >= debut)
+    if fin:
+        lignes = lignes.where(LogLine.timestamp <= fin)
+
+    resultats = []
+    curseur = None
+    taille_page = max(k, 200)
+    while len(resultats) < k:
+        occurrences = select(LogToken.line_id).where(LogToken.token == pivot)
+        if curseur is not None:
+            occurrences = occurrences.where(LogToken.line_id < curseur)
+        ids = db.session.execute(occurrences.order_by(LogToken.line_id.desc()).limit(taille_page)).scalars().all()
+        if not ids:
+            break
+        curseur = ids[-1]
+
+        candidats = ids
+        if autres:
+            candidats = db.session.execute(
+                select(LogToken.line_id)
+                .where(LogToken.token.in_(autres), LogToken.line_id.in_(ids))
+                .group_by(LogToken.line_id)
+                .having(func.count() == len(autres))
+            ).scalars().all()
+        if candidats:
+            page = db.session.execute(lignes.where(LogLine.id.in_(candidats)).order_by(LogLine.id.desc()))
+            for line_id, sid, ts, line in page:
+                texte = line.lower()
+                if all(phrase in texte for phrase in phrases):
+                    resultats.append((line_id, sid, ts, line))
+                    if len(resultats) >= k:
+                        break
+
+        if len(ids) < taille_page:
+            break
+
+    resultats.sort(key=lambda r: (r[2], r[0]), reverse=True)
+    return [(sid, ts, line) for _, sid, ts, line in resultats]
+
+
+def page_lignes(server_ids: list, apres: tuple = None, avant: tuple = None, limite: int = 200) -> list:
+    """
+    Renvoie une page de lignes fusionnées, paginée par clé sur (timestamp, server_id, id).
+
+    Sans curseur, renvoie la page la plus récente. Le coût d'une page ne dépend
+    que de sa taille, pas de sa position dans l'historique.
+
+    :param server_ids: Serveurs à inclure
+    :param apres: Curseur (timestamp, server_id, id) : lignes strictement postérieures
+    :param avant: Curseur (timestamp, server_id, id) : lignes strictement antérieures
+    :param limite: Taille de la page, bornée à TAILLE_PAGE_MAX
+    :return: Liste de tuples (timestamp, server_id, id, line) dans l'ordre chronologique
+    """
+    limite = min(max(int(limite), 1), TAILLE_PAGE_MAX)
+    cle = tuple_(LogLine.timestamp, LogLine.server_id, LogLine.id)
+    requete = select(LogLine.timestamp, LogLine.server_id, LogLine.id, LogLine.line).where(
+        LogLine.server_id.in_([int(i) for i in server_ids])
+    )
+
+    if apres is not None:
+        requete = requete.where(cle > tuple(apres)).order_by(
+            LogLine.timestamp, LogLine.server_id, LogLine.id
+        )
+        return db.session.execute(requete.limit(limite)).all()
+
+    if avant is not None:
+        requete = requete.where(cle < tuple(avant))
+    requete = requete.order_by(LogLine.timestamp.desc(), LogLine.server_id.desc(), LogLine.id.desc())
+    return db.session.execute(requete.limit(limite)).all()[::-1]
+
+
+def get_dernieres_lignes(server_id: int, n: int, debut: datetime = None, fin: datetime = None) -> list:
+    """
+    Renvoie les n lignes les plus récentes d'un serveur, dans l'ordre chronologique.
+
+    :param debut: Date minimale (incluse), facultative
+    :param fin: Date maximale (incluse), facultative ; la fenêtre est lue par l'index (server_id, timestamp)
+    :return: Liste de tuples (timestamp, line)
+    """
+    requete = select(LogLine.timestamp, LogLine.line).where(LogLine.server_id == int(server_id))
+    if debut is not None:
+        requete = requete.where(LogLine.timestamp >= debut)
+    if fin is not None:
+        requete = requete.where(LogLine.timestamp <= fin)
+    requete = requete.order_by(LogLine.timestamp.desc(), LogLine.id.desc()).limit(int(n))
+    return db.session.execute(requete).all()[::-1]
+
+
+def iter_lignes_serveur(server_id: int, debut: datetime = None, fin: datetime = None, taille_page: int = TAILLE_LOT):
+    """
+    Parcourt toutes les lignes d'un serveur dans l'ordre chronologique, page par page.
+
+    Chaque page est lue par clé (timestamp, id) sur l'index (server_id, timestamp) :
+    une seule page est en mémoire à la fois, quel que soit le nombre de lignes.
+    La transaction est terminée après chaque page (la session est validée) : un
+    long parcours ne garde pas la même transaction ouverte de bout en bout.
+
+    :param debut: Date minimale (incluse), facultative
+    :param fin: Date maximale (incluse), facultative
+    :param taille_page: Nombre de lignes lues par requête
+    :return: Générateur de tuples (timestamp, line)
+    """
+    requete = select(LogLine.timestamp, LogLine.id, LogLine.line).where(LogLine.server_id == int(server_id))
+    if debut is not None:
+        requete = requete.where(LogLine.timestamp >= debut)
+    if fin is not None:
+        requete = requete.where(LogLine.timestamp <= fin)
+    requete = requete.order_by(LogLine.timestamp, LogLine.id).limit(int(taille_page))
+
+    curseur = None
+    while True:
+        page = db.session.execute(
+            requete if curseur is None else requete.where(tuple_(LogLine.timestamp, LogLine.id) > curseur)
+        ).all()
+        # La page suivante est relue par clé : inutile de conserver la vue de lecture entre les deux
+        db.session.commit()
+        for timestamp, _, line in page:
+            yield timestamp, line
+        if len(page) < taille_page:
+            return
+        curseur = tuple(page[-1][:2])
+
+
+def get_derniers_timestamps() -> dict:
+    """Renvoie {server_id: timestamp de la ligne la plus récente} pour tous les serveurs collectés."""
+    requete = select(LogLine.server_id, func.max(LogLine.timestamp)).group_by(LogLine.server_id)
+    return dict(db.session.execute(requete).all())
+
+
+def purge_lignes(avant: datetime) -> int:
+    """Supprime les lignes plus anciennes que la date donnée et renvoie leur nombre."""
+    resultat = db.session.execute(delete(LogLine).where(LogLine.timestamp < avant))
+    db.session.commit()
+    return resultat.rowcount
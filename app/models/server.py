@@ -1,9 +1,13 @@
 from app.extensions import db
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Text
+from sqlalchemy import String, Integer, BigInteger, Text, select, update
 from os import system
+from typing import NamedTuple, Optional
+from threading import Lock
 import ipaddress
 from subprocess import run, TimeoutExpired
+from app.services.ssh_pool import evince_hote
+from app.services.incremental import reinitialise_curseur
 
 class Server(db.Model):
     """Modèle ORM de la table 'servers'."""
@@ -15,6 +19,80 @@ class Server(db.Model):
     description: Mapped[str] = mapped_column(Text, nullable=True)
 
 
+class ServersVersion(db.Model):
+    """Modèle ORM de la table 'servers_version' : compteur incrémenté à chaque modification de la table 'servers'."""
+    __tablename__ = "servers_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)  # Une seule ligne, id = 1
+    version: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), nullable=False)
+
+
+class ServeurInfo(NamedTuple):
+    """Copie en lecture seule d'un serveur, conservée dans l'inventaire partagé par les requêtes."""
+    id: int
+    name: str
+    ip: str
+    description: Optional[str]
+
+
+# Inventaire des serveurs du processus : (version, liste triée par id, {id: ServeurInfo})
+_inventaire = (None, [], {})
+_inventaire_lock = Lock()
+
+
+def _version_inventaire() -> int:
+    return db.session.execute(select(ServersVersion.version).where(ServersVersion.id == 1)).scalar() or 0
+
+
+def _incremente_version():
+    """Incrémente le compteur de version dans la transaction en cours (à appeler avant le commit)."""
+    resultat = db.session.execute(
+        update(ServersVersion).where(ServersVersion.id == 1).values(version=ServersVersion.version + 1)
+    )
+    if resultat.rowcount == 0:
+        db.session.add(ServersVersion(id=1, version=1))
+
+
+def _get_inventaire() -> tuple:
+    """
+    Renvoie l'inventaire des serveurs, rechargé uniquement si la version en base a changé.
+
+    Chaque appel coûte une lecture de clé primaire (la version) ; la table 'servers'
+    n'est relue qu'après un ajout, une modification ou une suppression, quel que
+    soit le worker qui l'a effectué.
+    """
+    global _inventaire
+    version = _version_inventaire()
+    inventaire = _inventaire
+    if inventaire[0] == version:
+        return inventaire
+
+    serveurs = [
+        ServeurInfo(serv.id, serv.name, serv.ip, serv.description)
+        for serv in db.session.execute(select(Server).order_by(Server.id)).scalars()
+    ]
+    inventaire = (version, serveurs, {serv.id: serv for serv in serveurs})
+    with _inventaire_lock:
+        _inventaire = inventaire
+    return inventaire
+
+
+def get_all_servers() -> list:
+    """Renvoie la liste de tous les serveurs (ServeurInfo), depuis l'inventaire partagé."""
+    return list(_get_inventaire()[1])
+
+
+def get_servers_by_ids(ids) -> list:
+    """
+    Renvoie les serveurs correspondant aux IDs donnés, dans le même ordre, en une seule lecture de l'inventaire.
+
+    :param ids: Itérable d'IDs entiers
+    :return: Liste de ServeurInfo (les IDs inconnus sont ignorés)
+    """
+    par_id = _get_inventaire()[2]
+    return [par_id[i] for i in ids if i in par_id]
+
+
 def host_up(hostname, waittime=200):
     """
     Fonction qui faire un ping sur une IP donné pour savoir si la machine est alive ou non.
@@ -62,8 +140,12 @@ def supprime_serv(serv_id:int):
         serv_id = int(serv_id)
 
         serv = Server.query.get(serv_id)
+        ip = serv.ip
         db.session.delete(serv)
+        _incremente_version()
         db.session.commit()
+        evince_hote(ip)  # Fermer les connexions SSH conservées vers ce serveur
+        reinitialise_curseur(ip)
         return True
     except:
         return False
@@ -73,6 +155,7 @@ def ajoute_server(nom:str, ip:str, desc:str):
     try:
         server = Server(name=str(nom), ip=str(ip), description=str(desc))
         db.session.add(server)
+        _incremente_version()
         db.session.commit()
         return True
     except:
@@ -96,6 +179,7 @@ def modif_server(id:int,name:str=None, ip:str=None, desc:str=None):
         id = int(id)
 
         serv = Server.query.get(id)
+        ancienne_ip = serv.ip
 
         if name :
             serv.name = str(name)
@@ -106,7 +190,12 @@ def modif_server(id:int,name:str=None, ip:str=None, desc:str=None):
             serv.description = str(desc)
 
         db.session.add(serv)
+        _incremente_version()
         db.session.commit()
+
+        if serv.ip != ancienne_ip:
+            evince_hote(ancienne_ip)  # Les connexions SSH vers l'ancienne IP ne doivent plus servir
+            reinitialise_curseur(ancienne_ip)
         return True
     except:
         return False
\ No newline at end of file
@@ -0,0 +1,41 @@
+from app.extensions import db
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, Float, DateTime, ForeignKey, select, delete, insert
+from datetime import datetime
+from typing import Optional
+
+
+class ServerStatus(db.Model):
+    """Modèle ORM de la table 'server_status' : dernier résultat des sondes de disponibilité d'un serveur."""
+    __tablename__ = "server_status"
+
+    server_id: Mapped[int] = mapped_column(Integer, ForeignKey('servers.id', ondelete="CASCADE"), primary_key=True)
+    icmp_rtt: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # ms, NULL si pas de réponse au ping
+    ssh_rtt: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # ms, NULL si le port SSH est fermé
+    verifie_le: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    @property
+    def joignable(self) -> bool:
+        return self.icmp_rtt is not None or self.ssh_rtt is not None
+
+
+def maj_statuts(etats: dict, verifie_le: datetime = None):
+    """
+    Enregistre le résultat d'un cycle de sondes, en une seule transaction.
+
+    :param etats: {server_id: EtatSante}
+    :param verifie_le: Date du cycle, maintenant par défaut
+    """
+    verifie_le = verifie_le or datetime.now()
+    db.session.execute(delete(ServerStatus).where(ServerStatus.server_id.in_(list(etats))))
+    if etats:
+        db.session.execute(insert(ServerStatus), [
+            {"server_id": server_id, "icmp_rtt": etat.icmp_rtt, "ssh_rtt": etat.ssh_rtt, "verifie_le": verifie_le}
+            for server_id, etat in etats.items()
+        ])
+    db.session.commit()
+
+
+def get_statuts() -> dict:
+    """Renvoie {server_id: ServerStatus} pour tous les serveurs déjà sondés."""
+    return {statut.server_id: statut for statut in db.session.execute(select(ServerStatus)).scalars()}
@@ -1,9 +1,10 @@
 from app.extensions import db
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Boolean, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column, relationship, joinedload
+from sqlalchemy import String, Boolean, ForeignKey, select, update
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import String, Integer
+from sqlalchemy import String, Integer, BigInteger
+from threading import Lock
 
 class User(db.Model, UserMixin):
     """Modèle ORM de la table 'users'."""
@@ -35,12 +36,96 @@ class User(db.Model, UserMixin):
         return bool(self.role.privileges & privilege_bit) # Opération bitwise AND
 
 
+class UsersVersion(db.Model):
+    """Modèle ORM de la table 'users_version' : compteur incrémenté à chaque modification de la table 'users'."""
+    __tablename__ = "users_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)  # Une seule ligne, id = 1
+    version: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), nullable=False)
+
+
+class Principal(UserMixin):
+    """
+    Utilisateur authentifié tel que vu par flask_login (current_user).
+
+    Détaché de la session SQLAlchemy : il ne contient que l'id, le nom et le
+    masque de privilèges du rôle, de sorte que les contrôles d'accès sont de
+    simples opérations bit à bit, sans requête.
+    """
+
+    def __init__(self, id: int, username: str, privileges: int):
+        self.id = id
+        self.username = username
+        self.privileges = privileges
+
+    def has_privilege(self, privilege_bit: int) -> bool:
+        """Vérifie si l'utilisateur a un privilège via son rôle."""
+        assert isinstance(privilege_bit, int)
+        assert 0 <= privilege_bit <= 7
+        return bool(self.privileges & privilege_bit)
+
+
+_principaux = {}  # user_id -> (version de la table 'users', Principal)
+_principaux_lock = Lock()
+
+
+def _version_utilisateurs() -> int:
+    return db.session.execute(select(UsersVersion.version).where(UsersVersion.id == 1)).scalar() or 0
+
+
+def _incremente_version():
+    """Incrémente le compteur de version dans la transaction en cours (à appeler avant le commit)."""
+    resultat = db.session.execute(
+        update(UsersVersion).where(UsersVersion.id == 1).values(version=UsersVersion.version + 1)
+    )
+    if resultat.rowcount == 0:
+        db.session.add(UsersVersion(id=1, version=1))
+
+
+def get_principal(user_id: int):
+    """
+    Renvoie l'utilisateur authentifié, chargé avec son rôle en une seule requête puis gardé
+    en mémoire tant que la version de la table 'users' n'a pas changé.
+
+    Chaque appel coûte une lecture de clé primaire (la version) : un changement de rôle
+    ou une suppression s'applique dès la requête suivante, quel que soit le worker qui
+    l'a effectué.
+
+    :param user_id: ID de l'utilisateur (celui stocké dans la session)
+    :return: Principal, ou None si l'utilisateur n'existe plus
+    """
+    user_id = int(user_id)
+    version = _version_utilisateurs()
+    entree = _principaux.get(user_id)
+    if entree is not None and entree[0] == version:
+        return entree[1]
+
+    user = db.session.execute(
+        select(User).options(joinedload(User.role)).where(User.id == user_id)
+    ).scalar_one_or_none()
+    if user is None:
+        invalide_principal(user_id)
+        return None
+
+    principal = Principal(user.id, user.username, user.role.privileges if user.role else 0)
+    with _principaux_lock:
+        _principaux[user_id] = (version, principal)
+    return principal
+
+
+def invalide_principal(user_id: int):
+    """Retire un utilisateur du cache des utilisateurs authentifiés."""
+    with _principaux_lock:
+        _principaux.pop(int(user_id), None)
+
+
 def ajoute_user(username:str, password:str, role_id:int=1):
     """Ajoute un utilisateur dans la base de données."""
     try:
         user = User(username=str(username), role_id=str(role_id))
         user.set_password(str(password))
         db.session.add(user)
+        _incremente_version()
         db.session.commit()
         return True
     except:
@@ -54,7 +139,9 @@ def supprime_user(user_id:int):
 
         user = User.query.get(user_id)
         db.session.delete(user)
+        _incremente_version()
         db.session.commit()
+        invalide_principal(user_id)
         return True
     except:
         return False
@@ -73,7 +160,9 @@ def maj_user(user_id:int, username:str=None, password:str=None, role_id:int=None
             assert isinstance(role_id, int)
             user.role_id = role_id
         db.session.add(user)
+        _incremente_version()
         db.session.commit()
+        invalide_principal(user_id)
         return True
     except:
         return False
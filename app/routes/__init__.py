@@ -6,6 +6,7 @@ from app.routes.auth import auth_bp
 from app.routes.serveurs import serveurs_bp
 from app.routes.journaux import journaux_bp
 from app.routes.utilisateurs import utilisateurs_bp
+from app.routes.metriques import metriques_bp
 
 # Créer une liste des blueprints à enregistrer dans l'app.
-blueprints = [main, auth_bp, serveurs_bp, journaux_bp, utilisateurs_bp]
+blueprints = [main, auth_bp, serveurs_bp, journaux_bp, utilisateurs_bp, metriques_bp]
@@ -1,31 +1,132 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import (
+    Blueprint, render_template, stream_template, request, redirect, url_for, flash,
+    get_flashed_messages, Response, jsonify, stream_with_context
+)
 from flask_login import login_required, current_user
-from app.models import Server, get_server_by_id
-from app.services import get_syslog
+from app.models import (
+    get_all_servers, get_servers_by_ids, get_dernieres_lignes, iter_lignes_serveur, recherche_lignes, page_lignes, get_statuts
+)
+from app.services import (
+    execute_en_parallele, iter_resultats, iter_records, fusionne, LogRecord, analyse_requete, get_recuperateur,
+    get_settings, en_cache, chronometre_iter, observe_etape, suit_hotes, quitte_hotes, parse_timestamp,
+    flux_export, FORMATS_EXPORT, TYPES_MIME, regroupe
+)
 from datetime import datetime
+from functools import partial
+from threading import Lock
+import json
+import sys
+import time
 
 journaux_bp = Blueprint('journaux', __name__, url_prefix='/journaux', template_folder='../templates')
 
+TAILLE_LOT_JSON = 2000  # Lignes par lot envoyé au défilement virtuel de la page
+BATTEMENT = 15  # Période (secondes) des commentaires SSE envoyés en l'absence de lignes (détecte les navigateurs partis)
 
-def get_all_servers() -> list:
-    """Renvoie la liste de tous les serveurs."""
-    return Server.query.all()
 
+def analyse_mesuree(ips: dict):
+    """
+    Renvoie un équivalent de iter_records qui chronomètre l'étape 'analyse' de chaque serveur.
+
+    :param ips: {nom du serveur: IP}, les métriques étant étiquetées par IP comme les étapes SSH
+    """
+    def analyse(server, lignes):
+        return chronometre_iter(iter_records(server, lignes), "analyse", ips.get(server, server))
+    return analyse
 
-def extract_timestamp(log_line):
+
+def reponse_en_flux(servers, appels, ips: dict) -> Response:
     """
-    Extrait et parse le timestamp d'une ligne de log.
-    :param log_line: Ligne de log
-    :return: datetime
+    Rend la page des journaux au fil de l'eau : chaque serveur est envoyé au
+    navigateur dès qu'il a répondu, puis fusionné côté client avec les autres.
     """
-    try:
-        timestamp_str = log_line.split()[0]
-        # Parser avec timezone
-        dt = datetime.fromisoformat(timestamp_str)
-        # Retirer la timezone (convert to naive datetime)
-        return dt.replace(tzinfo=None)
-    except (ValueError, IndexError):
-        return datetime.min
+    # Les messages flash doivent être retirés de la session avant l'envoi des en-têtes
+    get_flashed_messages(with_categories=True)
+
+    reponse = Response(stream_template(
+        "journaux.html", all_logs=None, servers=servers,
+        blocs=iter_resultats(appels), iter_records=analyse_mesuree(ips)
+    ))
+    reponse.headers["X-Accel-Buffering"] = "no"  # Désactive la mise en tampon d'un éventuel proxy nginx
+    return reponse
+
+
+def worker_bloquant() -> bool:
+    """Indique si la requête est servie par un worker Gunicorn 'sync' (une seule requête à la fois, tuée au --timeout)."""
+    return request.environ.get("SERVER_SOFTWARE", "").startswith("gunicorn/") and not request.environ.get("wsgi.multithread")
+
+
+def worker_cooperatif() -> bool:
+    """Indique si le processus tourne sous gevent (requêtes en greenlets, aucune limite de threads)."""
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("socket")
+
+
+_flux_actifs = 0  # Suivis en direct en cours dans ce worker
+_flux_lock = Lock()
+
+
+def reserve_flux() -> bool:
+    """Réserve une place de suivi en direct dans ce worker, False si 'direct_max_flux' est atteint."""
+    global _flux_actifs
+    maximum = get_settings().direct_max_flux
+    with _flux_lock:
+        if maximum > 0 and _flux_actifs >= maximum and not worker_cooperatif():
+            return False
+        _flux_actifs += 1
+        return True
+
+
+def libere_flux():
+    global _flux_actifs
+    with _flux_lock:
+        _flux_actifs -= 1
+
+
+def ligne_json(timestamp: datetime, server: str, line: str) -> dict:
+    """Ligne telle qu'affichée par le défilement virtuel de la page des journaux."""
+    return {"timestamp": timestamp.isoformat(), "heure": timestamp.strftime('%H:%M:%S'), "server": server, "line": line}
+
+
+@journaux_bp.app_template_global()
+def lots_json(records, taille: int = TAILLE_LOT_JSON):
+    """
+    Découpe un flux de LogRecord en lots de lignes JSON, insérés un par un dans la page.
+
+    Le navigateur ne crée des éléments que pour les lignes visibles, et le rendu
+    côté serveur se limite à une sérialisation JSON par lot.
+    """
+    lot = []
+    for record in records:
+        lot.append(ligne_json(*record))
+        if len(lot) >= taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+
+def records_base(server: str, lignes):
+    """Transforme les tuples (timestamp, line) lus en base en LogRecord du serveur donné."""
+    for timestamp, line in lignes:
+        yield LogRecord(timestamp, server, line)
+
+
+def rendu_journaux(servers, all_logs, regrouper: bool = False) -> str:
+    """
+    Rend la page des journaux, lignes par lignes ou regroupées par gabarit.
+
+    La fusion (et l'analyse des lignes SSH) étant paresseuse, elle s'exécute
+    pendant le rendu ou le regroupement : l'étape 'rendu' les inclut.
+    """
+    debut = time.perf_counter()
+    if regrouper and all_logs is not None:
+        # Une seule passe sur le flux fusionné : seuls les groupes sont envoyés au navigateur
+        page = render_template("journaux.html", all_logs=None, groupes=regroupe(all_logs), servers=servers)
+    else:
+        page = render_template("journaux.html", all_logs=all_logs, servers=servers)
+    observe_etape("rendu", "", time.perf_counter() - debut)
+    return page
 
 
 @journaux_bp.route('/', methods=['GET'])
@@ -37,7 +138,7 @@ def liste():
         return redirect(url_for("main.index"))
 
     servers = get_all_servers()
-    return render_template("journaux.html", all_logs=[], servers=servers)
+    return render_template("journaux.html", all_logs=None, servers=servers, statuts=get_statuts())
 
 
 @journaux_bp.route('/charger', methods=['POST'])
@@ -49,14 +150,17 @@ def charger():
         return redirect(url_for("main.index"))
 
     servers = get_all_servers()
-    logs_servers = []
-    all_logs = []
+    all_logs = None
 
     id_serv_list_select = request.form.getlist("id_serv_select")  # ID des serveurs sélectionnés
     nb_lignes = request.form.get("nb_lignes")  # Nombre de lignes à récupérer
+    regrouper = bool(request.form.get("regrouper"))  # Regroupement des lignes répétitives
+    debut = parse_date(request.form.get("debut"))  # Fenêtre de temps facultative
+    fin = parse_date(request.form.get("fin"))
 
     if nb_lignes == "":
-        nb_lignes = "100"
+        # Avec une fenêtre de temps, toute la fenêtre dans la limite du budget de la requête
+        nb_lignes = str(get_settings().max_lignes_requete) if debut or fin else "100"
     try:
         nb_lignes = int(nb_lignes)
     except:
@@ -64,34 +168,291 @@ def charger():
         nb_lignes = 100
 
     if id_serv_list_select:
+        ids = []
         for id_serv in id_serv_list_select:
-            serv = None
             try:
-                serv = get_server_by_id(int(id_serv))
-            except:
+                ids.append(int(id_serv))
+            except ValueError:
                 flash("Serveur invalide.", "danger")
 
-            if serv:
-                ip_serv = serv.ip
-                result, exit_code = get_syslog(ip_serv, int(nb_lignes))
+        # Tous les serveurs sélectionnés en une lecture de l'inventaire, quel que soit leur nombre
+        selection = get_servers_by_ids(ids)
+        for _ in range(len(ids) - len(selection)):
+            flash("Serveur introuvable.", "danger")
+
+        # Budget de lignes par chargement, réparti entre les serveurs sélectionnés
+        max_lignes_requete = get_settings().max_lignes_requete
+        max_par_serveur = max(max_lignes_requete // max(len(selection), 1), 1)
+        if nb_lignes > max_par_serveur:
+            flash(f"Nombre de lignes limité à {max_par_serveur} par serveur ({max_lignes_requete} au total).", "warning")
+            nb_lignes = max_par_serveur
+        nb_lignes = max(nb_lignes, 1)
+
+        # Lecture de la base locale alimentée par le collecteur : aucune connexion SSH
+        if request.form.get("source") == "base":
+            all_logs = fusionne([
+                records_base(serv.name, get_dernieres_lignes(serv.id, nb_lignes, debut, fin)) for serv in selection
+            ])
+            return rendu_journaux(servers, all_logs, regrouper)
+
+        # Source syslog (éventuellement incrémentale : seuls les octets ajoutés sont transférés,
+        # ou restreinte à une fenêtre de temps trouvée par dichotomie dans le fichier distant)
+        # ou journald (filtres période/unité/priorité appliqués sur l'hôte distant)
+        backend = request.form.get("backend") or get_settings().backend
+        incremental = bool(request.form.get("incremental"))
+        unite = request.form.get("unite", "").strip()
+        priorite = request.form.get("priorite", "").strip()
+        try:
+            recupere = get_recuperateur(backend, incremental=incremental, unite=unite, priorite=priorite, since=debut, until=fin)
+        except ValueError as e:
+            flash(str(e), "danger")
+            return render_template("journaux.html", all_logs=None, servers=servers)
 
-                if exit_code == 0:
-                    logs_servers.append([serv.name, result.split("\n")[::-1]])
-                else:
-                    flash(f"{result}", "danger")
+        # Cache partagé entre workers : une seule connexion SSH par hôte et par jeu de paramètres pendant le TTL
+        appels = {
+            serv.name: partial(
+                en_cache, (serv.id, serv.ip, backend, incremental, unite, priorite, debut, fin, nb_lignes),
+                partial(recupere, serv.ip, nb_lignes)
+            )
+            for serv in selection
+        }
+
+        ips = {serv.name: serv.ip for serv in selection}
+        if request.form.get("flux") and not regrouper:
+            return reponse_en_flux(servers, appels, ips)
+
+        # Interrogation de tous les serveurs en parallèle
+        resultats, erreurs = execute_en_parallele(appels)
+
+        logs_servers = {}
+        for server_name in appels:
+            if server_name in resultats:
+                logs_servers[server_name] = resultats[server_name]
+                if getattr(resultats[server_name], "tronque", ""):
+                    flash(f"{server_name} : {resultats[server_name].avertissement}", "warning")
             else:
-                flash("Serveur introuvable.", "danger")
+                flash(f"{server_name} : {erreurs[server_name]}", "danger")
+
+        # Fusion chronologique paresseuse, consommée directement par le template
+        if logs_servers:
+            analyse = analyse_mesuree(ips)
+            all_logs = fusionne([analyse(server_name, lignes) for server_name, lignes in logs_servers.items()])
+
+        return rendu_journaux(servers, all_logs, regrouper)
+
+    return render_template("journaux.html", all_logs=all_logs, servers=servers)
+
+
+@journaux_bp.route('/direct', methods=['GET'])
+@login_required
+def direct():
+    """Suivi en direct des serveurs sélectionnés (Server-Sent Events), un canal SSH par serveur et par worker"""
+    if not current_user.has_privilege(1):
+        return jsonify({"erreur": "Vous n'avez pas les droits nécessaires."}), 403
+    if worker_bloquant():
+        # Le flux occuperait le worker entier jusqu'à ce que Gunicorn le tue
+        return jsonify({"erreur": "Suivi en direct indisponible avec les workers Gunicorn 'sync' (utilisez gthread ou gevent)."}), 503
 
-        for server_name, logs in logs_servers:
-            for log in logs:
-                if log != "":
-                    all_logs.append({
-                        'server': server_name,
-                        'line': log,
-                        'timestamp': extract_timestamp(log)
-                    })
+    try:
+        ids = [int(i) for i in request.args.getlist("id_serv_select")]
+    except ValueError:
+        return jsonify({"erreur": "Paramètres invalides."}), 400
+    selection = get_servers_by_ids(ids)
+    if not selection:
+        return jsonify({"erreur": "Aucun serveur sélectionné."}), 400
+
+    backend = request.args.get("backend") or get_settings().backend
+    noms = {serv.ip: serv.name for serv in selection}
+    # Avec gthread, chaque suivi occupe un thread du worker pendant toute sa durée
+    if not reserve_flux():
+        return jsonify({"erreur": "Trop de suivis en direct en cours sur ce worker, réessayez plus tard."}), 503
+    try:
+        abonne = suit_hotes(list(noms), backend)
+    except ValueError as e:
+        libere_flux()
+        return jsonify({"erreur": str(e)}), 400
+
+    def evenements():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                lignes, erreurs, perdues = abonne.attend(BATTEMENT)
+                morceaux = []
+                for hote, message in erreurs:
+                    morceaux.append(f"event: erreur\ndata: {json.dumps(message, ensure_ascii=False)}\n\n")
+                if perdues:
+                    morceaux.append(f"event: perte\ndata: {perdues}\n\n")
+                for hote, ligne in lignes:
+                    timestamp = parse_timestamp(ligne) or datetime.now()
+                    donnees = {"heure": timestamp.strftime('%H:%M:%S'), "server": noms.get(hote, hote), "line": ligne}
+                    morceaux.append(f"data: {json.dumps(donnees, ensure_ascii=False)}\n\n")
+                # Sans nouvelle ligne, un commentaire : l'écriture échoue si le navigateur est parti
+                yield "".join(morceaux) or ": battement\n\n"
+        finally:
+            quitte_hotes(list(noms), backend, abonne)
+
+    reponse = Response(evenements(), mimetype="text/event-stream")
+    reponse.call_on_close(libere_flux)  # Appelé par le serveur WSGI à la fin de la réponse, même interrompue
+    reponse.headers["Cache-Control"] = "no-cache"
+    reponse.headers["X-Accel-Buffering"] = "no"  # Désactive la mise en tampon d'un éventuel proxy nginx
+    return reponse
+
+
+@journaux_bp.route('/export', methods=['GET'])
+@login_required
+def export():
+    """
+    Télécharge les logs fusionnés des serveurs sélectionnés (NDJSON, CSV ou texte, gzip facultatif).
+
+    La réponse est produite au fil de l'eau : depuis la base locale, chaque serveur
+    est lu page par page et fusionné à la volée, si bien que la mémoire utilisée ne
+    dépend pas de la taille de l'export ; depuis les hôtes (SSH), les récupérations
+    restent bornées par le budget max_lignes_requete.
+    """
+    if not current_user.has_privilege(1):
+        return jsonify({"erreur": "Vous n'avez pas les droits nécessaires."}), 403
+
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS_EXPORT:
+        return jsonify({"erreur": f"Format inconnu (attendu : {', '.join(FORMATS_EXPORT)})."}), 400
+    try:
+        ids = [int(i) for i in request.args.getlist("id_serv_select")]
+        debut = datetime.fromisoformat(request.args["debut"]) if request.args.get("debut") else None
+        fin = datetime.fromisoformat(request.args["fin"]) if request.args.get("fin") else None
+    except ValueError:
+        return jsonify({"erreur": "Paramètres invalides."}), 400
+    selection = get_servers_by_ids(ids)
+    if not selection:
+        return jsonify({"erreur": "Aucun serveur sélectionné."}), 400
+
+    entetes = {}
+    if request.args.get("source") == "ssh":
+        # Même chemin que le chargement : fan-out parallèle et cache partagé, dans la limite du budget
+        backend = request.args.get("backend") or get_settings().backend
+        nb_lignes = max(get_settings().max_lignes_requete // len(selection), 1)
+        try:
+            recupere = get_recuperateur(backend, since=debut, until=fin)
+        except ValueError as e:
+            return jsonify({"erreur": str(e)}), 400
+        appels = {
+            serv.name: partial(
+                en_cache, (serv.id, serv.ip, backend, False, "", "", debut, fin, nb_lignes),
+                partial(recupere, serv.ip, nb_lignes)
+            )
+            for serv in selection
+        }
+        resultats, erreurs = execute_en_parallele(appels)
+        if erreurs:
+            entetes["X-Serveurs-En-Erreur"] = ", ".join(sorted(erreurs))
+        records = fusionne(resultats)
+    else:
+        # Base locale : un curseur par serveur, fusion k-voies (une page par serveur en mémoire)
+        records = fusionne([records_base(serv.name, iter_lignes_serveur(serv.id, debut, fin)) for serv in selection])
+
+    compresse = bool(request.args.get("gzip"))
+    nom = f"journaux_{datetime.now():%Y%m%d_%H%M%S}.{fmt}" + (".gz" if compresse else "")
+    # stream_with_context : la session SQLAlchemy reste disponible pendant l'envoi
+    reponse = Response(
+        stream_with_context(flux_export(records, fmt, compresse)),
+        mimetype="application/gzip" if compresse else TYPES_MIME[fmt]
+    )
+    reponse.headers["Content-Disposition"] = f'attachment; filename="{nom}"'
+    reponse.headers["X-Accel-Buffering"] = "no"  # Désactive la mise en tampon d'un éventuel proxy nginx
+    reponse.headers.update(entetes)
+    return reponse
+
+
+def parse_date(valeur: str):
+    """Convertit la valeur d'un champ datetime-local en datetime, None si vide ou invalide."""
+    if not valeur:
+        return None
+    try:
+        return datetime.fromisoformat(valeur)
+    except ValueError:
+        flash(f"Date invalide : {valeur}", "danger")
+        return None
+
+
+@journaux_bp.route('/recherche', methods=['GET'])
+@login_required
+def recherche():
+    """Recherche plein texte dans les lignes collectées (base locale)"""
+    if not current_user.has_privilege(1):
+        flash("Vous n'avez pas les droits nécessaires pour accéder à cette page.", "warning")
+        return redirect(url_for("main.index"))
 
-        all_logs.sort(key=lambda x: x['timestamp'])
+    servers = get_all_servers()
+    noms = {serv.id: serv.name for serv in servers}
+
+    jetons, phrases = analyse_requete(request.args.get("q", ""))
+    if not jetons:
+        flash("Saisissez au moins un terme de recherche (2 caractères minimum).", "warning")
+        return render_template("journaux.html", all_logs=None, servers=servers)
 
+    try:
+        server_ids = [int(i) for i in request.args.getlist("id_serv_select")]
+    except ValueError:
+        flash("Serveur invalide.", "danger")
+        return render_template("journaux.html", all_logs=None, servers=servers)
+
+    try:
+        k = min(max(int(request.args.get("k", 100)), 1), 1000)
+    except ValueError:
+        k = 100
+
+    resultats = recherche_lignes(
+        jetons, phrases,
+        server_ids=server_ids,
+        debut=parse_date(request.args.get("debut")),
+        fin=parse_date(request.args.get("fin")),
+        k=k,
+    )
+    if not resultats:
+        flash("Aucune ligne ne correspond à la recherche.", "info")
+
+    # Les k plus récentes, affichées dans l'ordre chronologique
+    all_logs = [LogRecord(ts, noms.get(sid, str(sid)), line) for sid, ts, line in reversed(resultats)]
     return render_template("journaux.html", all_logs=all_logs, servers=servers)
 
+
+def encode_curseur(timestamp: datetime, server_id: int, line_id: int) -> str:
+    """Curseur de pagination opaque pour l'API JSON."""
+    return f"{timestamp.isoformat()}|{server_id}|{line_id}"
+
+
+def decode_curseur(curseur: str):
+    """Inverse de encode_curseur. Lève ValueError si le curseur est invalide."""
+    if not curseur:
+        return None
+    timestamp, server_id, line_id = curseur.split("|")
+    return datetime.fromisoformat(timestamp), int(server_id), int(line_id)
+
+
+@journaux_bp.route('/api/lines', methods=['GET'])
+@login_required
+def api_lignes():
+    """Renvoie une page de lignes fusionnées (base locale) au format JSON, paginée par clé"""
+    if not current_user.has_privilege(1):
+        return jsonify({"erreur": "Vous n'avez pas les droits nécessaires."}), 403
+
+    try:
+        server_ids = [int(i) for i in request.args.getlist("id_serv_select")]
+        apres = decode_curseur(request.args.get("apres"))
+        avant = decode_curseur(request.args.get("avant"))
+        limite = int(request.args.get("limite", 200))
+    except ValueError:
+        return jsonify({"erreur": "Paramètres invalides."}), 400
+
+    if not server_ids:
+        return jsonify({"lignes": [], "avant": None, "apres": None})
+
+    noms = {serv.id: serv.name for serv in get_all_servers()}
+    page = page_lignes(server_ids, apres=apres, avant=avant, limite=limite)
+
+    lignes = [ligne_json(timestamp, noms.get(server_id, str(server_id)), line) for timestamp, server_id, line_id, line in page]
+    return jsonify({
+        "lignes": lignes,
+        # Curseurs pour la page précédente / suivante (réutilisent la borne courante si la page est vide)
+        "avant": encode_curseur(*page[0][:3]) if page else request.args.get("avant"),
+        "apres": encode_curseur(*page[-1][:3]) if page else request.args.get("apres"),
+    })
@@ -0,0 +1,59 @@
+from flask import Blueprint, Response, request, g, current_app, abort
+from app.services import get_settings, mesures_requete, observe, ecrit, format_prometheus, detail_requete
+import json
+import time
+
+metriques_bp = Blueprint('metriques', __name__)
+
+
+@metriques_bp.before_app_request
+def debut_requete():
+    """Démarre le chronomètre de la requête et une liste vide de mesures par étape."""
+    g.debut_requete = time.perf_counter()
+    mesures_requete.set([])
+
+
+@metriques_bp.after_app_request
+def fin_requete(response):
+    """
+    Enregistre la durée de la requête une fois la réponse entièrement envoyée
+    (les pages rendues au fil de l'eau se terminent après la vue), et journalise
+    le détail par étape des requêtes lentes.
+    """
+    debut = g.get("debut_requete")
+    if debut is None or request.endpoint in (None, "static"):
+        return response
+    if response.mimetype == "text/event-stream":
+        return response  # Suivi en direct : la durée est celle de la visite, pas un temps de réponse
+
+    mesures = mesures_requete.get()  # Même liste que celle complétée pendant l'envoi d'une réponse en flux
+    if mesures is None:
+        mesures = []
+    route = request.url_rule.rule  # Gabarit de l'URL, pour ne pas multiplier les séries
+    methode, chemin = request.method, request.path
+    logger = current_app.logger
+    try:
+        seuil = get_settings().requete_lente
+    except (EnvironmentError, OSError, ValueError):
+        seuil = 0
+
+    def termine():
+        duree = time.perf_counter() - debut
+        observe("monitoring_requete_duree_secondes", duree, route=route)
+        if seuil > 0 and duree >= seuil:
+            logger.warning(
+                "Requête lente : %s %s en %.0f ms, détail par étape (ms) : %s",
+                methode, chemin, duree * 1000, json.dumps(detail_requete(mesures), ensure_ascii=False)
+            )
+        ecrit()
+
+    response.call_on_close(termine)
+    return response
+
+
+@metriques_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Métriques de tous les workers au format texte Prometheus (accès limité à metriques_ips)"""
+    if request.remote_addr not in get_settings().metriques_ips:
+        abort(403)
+    return Response(format_prometheus(), mimetype="text/plain; version=0.0.4; charset=utf-8")
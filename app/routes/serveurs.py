@@ -1,18 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.models import (
-    Server, server_exist, ajoute_server, host_up, get_server_by_id,
-    is_ipv4_valide, supprime_serv, modif_server, ip_in_use
+    server_exist, ajoute_server, get_server_by_id, get_all_servers,
+    is_ipv4_valide, supprime_serv, modif_server, ip_in_use, get_statuts, maj_statuts
 )
+from app.services import get_settings, sonde_serveurs, etats_disjoncteurs, reinitialise_disjoncteur, delais_pour
 
 serveurs_bp = Blueprint('serveurs', __name__, url_prefix='/serveurs', template_folder='../templates')
 
 
-def get_all_servers() -> list:
-    """Renvoie la liste de tous les serveurs."""
-    return Server.query.all()
-
-
 @serveurs_bp.route('/', methods=['GET'])
 @login_required
 def liste():
@@ -22,7 +18,12 @@ def liste():
         return redirect(url_for("main.index"))
 
     servers = get_all_servers()
-    return render_template("serveurs.html", servers=servers)
+    # État mis à jour en arrière-plan par le collecteur : aucune sonde pendant la requête
+    settings = get_settings()
+    return render_template(
+        "serveurs.html", servers=servers, statuts=get_statuts(), disjoncteurs=etats_disjoncteurs(),
+        delais={server.ip: delais_pour(server.ip, settings) for server in servers}
+    )
 
 
 @serveurs_bp.route('/ajouter', methods=['POST'])
@@ -127,7 +128,7 @@ def modifier(server_id):
 @serveurs_bp.route('/<int:server_id>/ping', methods=['POST'])
 @login_required
 def ping(server_id):
-    """Teste la connectivité d'un serveur (ping)"""
+    """Teste immédiatement la connectivité d'un serveur (ping et port SSH)"""
     if not current_user.has_privilege(2):
         flash("Vous n'avez pas les droits nécessaires pour accéder à cette page.", "warning")
         return redirect(url_for("main.index"))
@@ -136,10 +137,17 @@ def ping(server_id):
     if server:
         ip_server = server.ip
         if is_ipv4_valide(ip_server):
-            if host_up(ip_server):
-                flash(f"Le serveur {ip_server} est joignable.", "success")
+            etat = sonde_serveurs([ip_server], get_settings().sante_timeout)[ip_server]
+            maj_statuts({server.id: etat})
+            if etat.icmp_rtt is not None:
+                flash(f"Le serveur {ip_server} est joignable ({etat.icmp_rtt:.1f} ms).", "success")
+            elif etat.ssh_rtt is not None:
+                flash(f"Le serveur {ip_server} ne répond pas au ping mais son port SSH est ouvert.", "warning")
             else:
                 flash(f"Le serveur {ip_server} n'est pas joignable.", "danger")
+            if etat.ssh_rtt is not None:
+                # Port SSH de nouveau ouvert : le serveur est réinterrogé sans attendre la fin du délai
+                reinitialise_disjoncteur(ip_server)
         else:
             flash("L'adresse IP n'est pas valide.", "danger")
     else:
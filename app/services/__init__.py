@@ -1,5 +1,37 @@
-from .services import get_syslog, load_config
+from .services import get_syslog, load_config, execute_commande, execute_commande_octets, execute_commande_lignes, nouvelle_connexion
+from .incremental import get_syslog_incremental, get_nouvelles_lignes, reinitialise_curseur
+from .fanout import execute_en_parallele, iter_resultats
+from .ssh_pool import evince_hote
+from .disjoncteur import EtatDisjoncteur, etats_disjoncteurs, reinitialise_disjoncteur, delais_pour
+from .configuration import Settings, get_settings
+from .fusion import LogRecord, Lignes, Horodatees, borne_lignes, extract_timestamp, iter_records, fusionne
+from .recherche import tokenise, analyse_requete
+from .horodatage import parse_timestamp, parse_lignes, detecte_format
+from .journald import get_journal
+from .fenetre import get_syslog_fenetre
+from .backends import BACKENDS, get_recuperateur
+from .cache import en_cache
+from .sante import EtatSante, sonde_serveurs, ping_lot, tcp_lot
+from .regroupement import Groupe, Regroupement, regroupe
+from .export import FORMATS as FORMATS_EXPORT, TYPES_MIME, flux_export
+from .direct import Abonne, suit_hotes, quitte_hotes, nombre_canaux
+from .metriques import mesures_requete, observe, observe_etape, chronometre_iter, ecrit, format_prometheus, detail_requete
 
 __all__ = [
-    'get_syslog', 'load_config'
+    'get_syslog', 'load_config', 'execute_commande', 'execute_commande_octets', 'execute_commande_lignes', 'nouvelle_connexion',
+    'get_syslog_incremental', 'get_nouvelles_lignes', 'reinitialise_curseur',
+    'execute_en_parallele', 'iter_resultats',
+    'evince_hote',
+    'EtatDisjoncteur', 'etats_disjoncteurs', 'reinitialise_disjoncteur', 'delais_pour',
+    'Settings', 'get_settings',
+    'LogRecord', 'Lignes', 'Horodatees', 'borne_lignes', 'extract_timestamp', 'iter_records', 'fusionne',
+    'tokenise', 'analyse_requete',
+    'parse_timestamp', 'parse_lignes', 'detecte_format',
+    'get_journal', 'get_syslog_fenetre', 'BACKENDS', 'get_recuperateur',
+    'en_cache',
+    'EtatSante', 'sonde_serveurs', 'ping_lot', 'tcp_lot',
+    'Groupe', 'Regroupement', 'regroupe',
+    'FORMATS_EXPORT', 'TYPES_MIME', 'flux_export',
+    'Abonne', 'suit_hotes', 'quitte_hotes', 'nombre_canaux',
+    'mesures_requete', 'observe', 'observe_etape', 'chronometre_iter', 'ecrit', 'format_prometheus', 'detail_requete'
 ]
\ No newline at end of file
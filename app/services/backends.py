@@ -0,0 +1,41 @@
+"""
+Choix de la source des logs d'un hôte : fichier /var/log/syslog (lu par tail)
+ou journal systemd (lu par journalctl). Chaque source est une fonction
+(host, lines) -> (résultat, code) utilisable telle quelle par le fan-out.
+"""
+
+from datetime import datetime
+from functools import partial
+from .services import get_syslog
+from .incremental import get_syslog_incremental
+from .journald import get_journal
+from .fenetre import get_syslog_fenetre
+from .configuration import get_settings
+
+BACKENDS = ("syslog", "journald")
+
+
+def get_recuperateur(backend: str = None, incremental: bool = False, unite: str = None, priorite: str = None,
+                     since: datetime = None, until: datetime = None):
+    """
+    Renvoie la fonction de récupération correspondant à la source demandée.
+
+    :param backend: 'syslog' ou 'journald' (par défaut : option 'backend' de la configuration)
+    :param incremental: Lecture incrémentale du fichier syslog (ignoré pour journald et avec une fenêtre de temps)
+    :param unite: Filtre sur l'unité systemd (journald uniquement)
+    :param priorite: Filtre sur la priorité (journald uniquement)
+    :param since: Début de la fenêtre de temps (incluse)
+    :param until: Fin de la fenêtre de temps (incluse)
+    :return: Fonction (host, lines) -> (résultat, code)
+    """
+    backend = backend or get_settings().backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Source de logs inconnue : {backend}")
+    if since and until and since > until:
+        raise ValueError("La date de début doit précéder la date de fin.")
+
+    if backend == "journald":
+        return partial(get_journal, unite=unite or None, priorite=priorite or None, since=since, until=until)
+    if since or until:
+        return partial(get_syslog_fenetre, since=since, until=until)
+    return get_syslog_incremental if incremental else get_syslog
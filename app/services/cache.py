@@ -0,0 +1,234 @@
+"""
+Cache des résultats de récupération de logs, partagé par tous les workers Gunicorn.
+
+Les résultats sont stockés dans un fichier SQLite local (aucun service externe),
+avec une durée de vie (TTL) et une éviction LRU bornée en nombre d'entrées.
+Les requêtes identiques simultanées sont regroupées : le premier worker qui
+rate le cache prend un bail sur la clé et interroge l'hôte, les autres
+attendent son résultat au lieu d'ouvrir leur propre connexion SSH.
+Les erreurs sont aussi mises en cache, brièvement, pour qu'un hôte injoignable
+ne soit pas réinterrogé successivement par chaque requête en attente.
+"""
+
+from datetime import datetime
+from threading import Lock, local
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import time
+from .configuration import get_settings
+from .fanout import DEADLINE
+from .fusion import Lignes, Horodatees
+
+TTL_ERREUR = 5  # Durée de vie maximale (secondes) d'une erreur en cache
+ATTENTE_SONDAGE = 0.05  # Intervalle (secondes) de vérification pendant l'attente d'un autre worker
+DUREE_BAIL = DEADLINE  # Au-delà, un bail est considéré comme abandonné (worker tué en cours de récupération)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resultats (
+    cle TEXT PRIMARY KEY,
+    valeur TEXT NOT NULL,
+    expire REAL NOT NULL,
+    acces REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_resultats_acces ON resultats(acces);
+CREATE TABLE IF NOT EXISTS baux (
+    cle TEXT PRIMARY KEY,
+    expire REAL NOT NULL
+);
+"""
+
+
+def repertoire_prive(chemin: str) -> str:
+    """
+    Crée au besoin un répertoire réservé à l'utilisateur courant (mode 0700) et vérifie qu'il l'est.
+
+    Un répertoire existant n'est accepté que s'il appartient à l'utilisateur courant
+    et n'est accessible qu'à lui : dans le répertoire temporaire partagé, un autre
+    utilisateur pourrait l'avoir créé à l'avance pour y placer ses propres fichiers.
+
+    :raises PermissionError: Si le répertoire existe sans être privé
+    """
+    try:
+        os.mkdir(chemin, 0o700)
+    except FileExistsError:
+        pass
+    etat = os.lstat(chemin)
+    if not stat.S_ISDIR(etat.st_mode) or etat.st_uid != os.getuid() or etat.st_mode & 0o077:
+        raise PermissionError(f"{chemin} doit être un répertoire de l'utilisateur courant, en mode 0700")
+    return chemin
+
+
+def chemin_par_defaut() -> str:
+    """Fichier du cache (et des disjoncteurs), dans un répertoire privé du répertoire temporaire."""
+    return os.path.join(repertoire_prive(os.path.join(tempfile.gettempdir(), f"monitoring_{os.getuid()}")), "cache.sqlite")
+
+
+def _encode(resultat, code: int) -> str:
+    """Sérialise un résultat (texte, liste de lignes ou Horodatees) en JSON."""
+    if isinstance(resultat, Horodatees):
+        contenu = {"h": [(timestamp.isoformat(), ligne) for timestamp, ligne in resultat]}
+    elif isinstance(resultat, str):
+        contenu = {"t": resultat}
+    else:
+        contenu = {"l": list(resultat)}
+    contenu["code"] = code
+    contenu["tronque"] = getattr(resultat, "tronque", "")
+    return json.dumps(contenu, ensure_ascii=False)
+
+
+def _decode(valeur: str) -> tuple:
+    contenu = json.loads(valeur)
+    if "h" in contenu:
+        resultat = Horodatees((datetime.fromisoformat(timestamp), ligne) for timestamp, ligne in contenu["h"])
+    elif "t" in contenu:
+        return contenu["t"], contenu["code"]
+    else:
+        resultat = Lignes(contenu["l"])
+    resultat.tronque = contenu.get("tronque", "")
+    return resultat, contenu["code"]
+
+
+class CacheResultats:
+    """Cache TTL/LRU dans un fichier SQLite, avec regroupement des requêtes identiques en cours."""
+
+    def __init__(self, chemin: str, ttl: float, max_entrees: int):
+        self.chemin = chemin
+        self.ttl = ttl
+        self.max_entrees = max_entrees
+        self._local = local()  # Une connexion SQLite par thread
+        self._schema_pret = False
+
+    def _connexion(self) -> sqlite3.Connection:
+        cnx = getattr(self._local, "cnx", None)
+        if cnx is None:
+            cnx = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+            cnx.execute("PRAGMA journal_mode=WAL")  # Lectures concurrentes pendant les écritures
+            cnx.execute("PRAGMA synchronous=OFF")  # Un cache peut être perdu sans conséquence
+            if not self._schema_pret:
+                cnx.executescript(SCHEMA)
+                self._schema_pret = True
+            self._local.cnx = cnx
+        return cnx
+
+    def _lit(self, cnx, cle: str):
+        maintenant = time.time()
+        ligne = cnx.execute(
+            "SELECT valeur FROM resultats WHERE cle = ? AND expire > ?", (cle, maintenant)
+        ).fetchone()
+        if ligne is None:
+            return None
+        cnx.execute("UPDATE resultats SET acces = ? WHERE cle = ?", (maintenant, cle))
+        return _decode(ligne[0])
+
+    def _prend_bail(self, cnx, cle: str) -> bool:
+        """Tente de devenir le worker chargé de calculer la clé."""
+        maintenant = time.time()
+        cnx.execute("BEGIN IMMEDIATE")
+        try:
+            cnx.execute("DELETE FROM baux WHERE cle = ? AND expire <= ?", (cle, maintenant))
+            curseur = cnx.execute(
+                "INSERT OR IGNORE INTO baux (cle, expire) VALUES (?, ?)", (cle, maintenant + DUREE_BAIL)
+            )
+            cnx.execute("COMMIT")
+        except BaseException:
+            cnx.execute("ROLLBACK")
+            raise
+        return curseur.rowcount == 1
+
+    def _ecrit(self, cnx, cle: str, resultat, code: int):
+        maintenant = time.time()
+        ttl = self.ttl if code == 0 else min(self.ttl, TTL_ERREUR)
+        cnx.execute("BEGIN IMMEDIATE")
+        try:
+            cnx.execute(
+                "INSERT OR REPLACE INTO resultats (cle, valeur, expire, acces) VALUES (?, ?, ?, ?)",
+                (cle, _encode(resultat, code), maintenant + ttl, maintenant)
+            )
+            cnx.execute("DELETE FROM resultats WHERE expire <= ?", (maintenant,))
+            # Éviction LRU : on ne garde que les max_entrees entrées les plus récemment lues
+            cnx.execute(
+                "DELETE FROM resultats WHERE cle IN "
+                "(SELECT cle FROM resultats ORDER BY acces DESC LIMIT -1 OFFSET ?)", (self.max_entrees,)
+            )
+            cnx.execute("COMMIT")
+        except BaseException:
+            cnx.execute("ROLLBACK")
+            raise
+
+    def _rend_bail(self, cnx, cle: str):
+        cnx.execute("DELETE FROM baux WHERE cle = ?", (cle,))
+
+    def obtient(self, cle: str, fonction) -> tuple:
+        """
+        Renvoie le résultat en cache pour la clé, ou appelle fonction() une seule fois pour tous les workers.
+
+        :param cle: Clé du résultat (serveur et paramètres de récupération)
+        :param fonction: Fonction sans argument renvoyant (résultat, code)
+        :return: Tuple (résultat, code)
+        """
+        try:
+            cnx = self._connexion()
+            fin_attente = time.monotonic() + DUREE_BAIL
+            while True:
+                valeur = self._lit(cnx, cle)
+                if valeur is not None:
+                    return valeur
+                if self._prend_bail(cnx, cle):
+                    break
+                if time.monotonic() >= fin_attente:
+                    return fonction()
+                time.sleep(ATTENTE_SONDAGE)  # Un autre worker interroge déjà cet hôte
+        except sqlite3.Error:
+            # Une erreur du cache ne doit jamais empêcher l'affichage des logs
+            return fonction()
+
+        try:
+            resultat, code = fonction()
+            try:
+                self._ecrit(cnx, cle, resultat, code)
+            except sqlite3.Error:
+                pass
+            return resultat, code
+        finally:
+            try:
+                self._rend_bail(cnx, cle)
+            except sqlite3.Error:
+                pass
+
+
+_cache = None
+_cache_lock = Lock()
+
+
+def get_cache():
+    """Renvoie le cache correspondant à la configuration courante, ou None s'il est désactivé."""
+    global _cache
+    settings = get_settings()
+    if settings.cache_ttl <= 0:
+        return None
+    chemin = settings.cache_path or chemin_par_defaut()
+    with _cache_lock:
+        if (_cache is None or _cache.chemin != chemin or _cache.ttl != settings.cache_ttl
+                or _cache.max_entrees != settings.cache_max_entrees):
+            _cache = CacheResultats(chemin, settings.cache_ttl, settings.cache_max_entrees)
+        return _cache
+
+
+def en_cache(cle: tuple, fonction) -> tuple:
+    """
+    Appelle fonction() à travers le cache partagé, s'il est activé.
+
+    :param cle: Tuple identifiant la requête, ex. (server_id, ip, source, nb_lignes, filtres...)
+    :param fonction: Fonction sans argument renvoyant (résultat, code)
+    :return: Tuple (résultat, code)
+    """
+    try:
+        cache = get_cache()
+    except Exception:
+        cache = None
+    if cache is None:
+        return fonction()
+    return cache.obtient(repr(cle), fonction)
@@ -0,0 +1,93 @@
+"""
+Compression du flux des logs entre les hôtes surveillés et le serveur de monitoring.
+
+Modes disponibles (option 'compression' du fichier de configuration, globale
+ou par serveur) :
+- none : texte brut (comportement historique) ;
+- ssh : compression zlib du transport SSH, transparente pour les commandes ;
+- gzip / zstd : la sortie de la commande distante est compressée sur l'hôte
+  puis décompressée au fil de l'eau.
+
+Dans tous les cas, le flux est découpé en lignes bloc par bloc : ni le flux
+compressé ni le texte complet ne sont conservés en mémoire.
+"""
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # Dépendance facultative : le mode 'zstd' n'est alors pas disponible
+    zstandard = None
+
+MODES = ("none", "ssh", "gzip", "zstd")
+TAILLE_BLOC = 64 * 1024  # Taille des lectures sur le canal SSH
+
+_Decompress = type(zlib.decompressobj())
+
+_filtres = {
+    "gzip": "gzip -c",
+    "zstd": "zstd -c -q",
+}
+
+
+def verifie_mode(mode: str) -> str:
+    """Valide un mode de compression et le renvoie. Lève ValueError s'il est inconnu ou indisponible."""
+    if mode not in MODES:
+        raise ValueError(f"Mode de compression inconnu : {mode} (attendu : {', '.join(MODES)})")
+    if mode == "zstd" and zstandard is None:
+        raise ValueError("Le mode de compression 'zstd' nécessite le paquet Python 'zstandard'.")
+    return mode
+
+
+def commande_compressee(commande: str, mode: str) -> str:
+    """
+    Ajoute la compression côté hôte à une commande ('gzip' ou 'zstd').
+
+    Le filtre installé par setup_client.sh exécute les tubes avec 'pipefail' :
+    un échec de la commande n'est pas masqué par le code de retour du compresseur.
+    """
+    return f"{commande} | {_filtres[mode]}"
+
+
+def _decompresseur(mode: str):
+    if mode == "gzip":
+        return zlib.decompressobj(wbits=31)  # 31 : en-tête et somme de contrôle gzip
+    if mode == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None  # 'none' ou 'ssh' : le flux reçu est déjà du texte
+
+
+def _morceaux(decompresseur, bloc: bytes):
+    """Décompresse un bloc en morceaux bornés : un bloc très compressible ne produit jamais un texte énorme d'un coup."""
+    if decompresseur is None:
+        yield bloc
+    elif isinstance(decompresseur, _Decompress):
+        while bloc:
+            yield decompresseur.decompress(bloc, TAILLE_BLOC)
+            bloc = decompresseur.unconsumed_tail
+    else:
+        yield decompresseur.decompress(bloc)
+
+
+def iter_lignes_flux(blocs, mode: str):
+    """
+    Décompresse si besoin un flux de blocs d'octets et le découpe en lignes au fil de l'eau.
+
+    :param blocs: Itérable de blocs d'octets reçus du canal SSH
+    :param mode: Mode de compression de l'hôte
+    :return: Générateur de lignes (str, sans retour à la ligne, lignes vides ignorées)
+    """
+    decompresseur = _decompresseur(mode)
+    reste = b""
+    for bloc in blocs:
+        for morceau in _morceaux(decompresseur, bloc):
+            donnees = reste + morceau
+            fin = donnees.rfind(b"\n") + 1
+            reste = donnees[fin:]
+            for ligne in donnees[:fin].decode("utf-8", errors="replace").split("\n"):
+                if ligne:
+                    yield ligne
+    if mode == "gzip":
+        reste += decompresseur.flush()
+    if reste:
+        yield reste.decode("utf-8", errors="replace")
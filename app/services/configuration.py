@@ -0,0 +1,125 @@
+"""
+Fournisseur de configuration partagé.
+
+Le fichier YAML désigné par PATH_CONFIG n'est parsé qu'une seule fois. Il est
+relu uniquement lorsque sa date de modification, son inode ou sa taille change,
+ce qui évite un open + yaml.safe_load par hôte et par requête.
+"""
+
+from dataclasses import dataclass, field
+from threading import Lock
+import os
+import yaml
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Paramètres typés issus du fichier de configuration YAML."""
+    ssh_user: str
+    ssh_priv_key_path: str
+    mariadb_logs_user_password: str = ""
+    ssh_connect_timeout: float = 5  # Timeout de connexion TCP
+    ssh_banner_timeout: float = 5  # Timeout pour la bannière SSH
+    ssh_auth_timeout: float = 5  # Timeout pour l'authentification
+    ssh_command_timeout: float = 8  # Timeout d'exécution de la commande distante
+    backend: str = "syslog"  # Source des logs par défaut : 'syslog' ou 'journald'
+    compression: str = "none"  # Compression du transfert des logs : 'none', 'ssh', 'gzip' ou 'zstd'
+    compression_serveurs: dict = field(default_factory=dict, compare=False)  # IP ou nom -> mode, prioritaire
+    max_lignes_requete: int = 100000  # Nombre maximum de lignes demandées par chargement, tous serveurs confondus
+    max_octets_hote: int = 64 * 1024 * 1024  # Budget mémoire des lignes reçues d'un hôte (les plus anciennes sont écartées)
+    cache_ttl: float = 10  # Durée de vie (secondes) des résultats en cache partagé, 0 pour désactiver
+    cache_path: str = ""  # Fichier SQLite du cache (par défaut dans le répertoire temporaire)
+    cache_max_entrees: int = 256  # Nombre maximum de résultats conservés (éviction LRU)
+    collecte_intervalle: float = 30  # Période (secondes) du collecteur en arrière-plan
+    collecte_lignes_initiales: int = 1000  # Lignes lues au premier passage du collecteur sur un hôte
+    retention_jours: int = 7  # Durée de conservation des lignes collectées
+    sante_intervalle: float = 15  # Période (secondes) des sondes de disponibilité du collecteur
+    sante_timeout: float = 2  # Attente maximale (secondes) des réponses ping et SSH
+    metriques_dir: str = ""  # Répertoire des fichiers de métriques par processus (par défaut dans le répertoire temporaire)
+    metriques_ips: tuple = ("127.0.0.1", "::1")  # Adresses autorisées à lire /metrics
+    requete_lente: float = 5  # Durée (secondes) au-delà de laquelle une requête est journalisée avec son détail, 0 pour désactiver
+    disjoncteur_echecs: int = 3  # Échecs consécutifs avant d'écarter un hôte, 0 pour désactiver le disjoncteur
+    disjoncteur_delai: float = 30  # Durée (secondes) pendant laquelle un hôte écarté n'est plus interrogé
+    direct_max_flux: int = 4  # Suivis en direct simultanés par worker à threads (gthread), 0 pour ne pas limiter
+    timeouts_adaptatifs: bool = True  # Timeouts de connexion SSH adaptés aux durées observées de chaque hôte (les valeurs configurées restent le maximum)
+    raw: dict = field(default_factory=dict, compare=False, repr=False)  # Contenu brut, pour les options facultatives
+
+    @classmethod
+    def from_dict(cls, cfg: dict) -> "Settings":
+        """Construit les paramètres à partir du contenu du fichier YAML."""
+        if not isinstance(cfg, dict):
+            raise ValueError("Le fichier de configuration doit contenir un dictionnaire YAML.")
+        return cls(
+            ssh_user=str(cfg['ssh_user']),
+            ssh_priv_key_path=str(cfg['ssh_priv_key_path']),
+            mariadb_logs_user_password=str(cfg.get('mariadb_logs_user_password', "")),
+            ssh_connect_timeout=float(cfg.get('ssh_connect_timeout', 5)),
+            ssh_banner_timeout=float(cfg.get('ssh_banner_timeout', 5)),
+            ssh_auth_timeout=float(cfg.get('ssh_auth_timeout', 5)),
+            ssh_command_timeout=float(cfg.get('ssh_command_timeout', 8)),
+            backend=str(cfg.get('backend', "syslog")),
+            compression=str(cfg.get('compression', "none")),
+            compression_serveurs={str(h): str(m) for h, m in (cfg.get('compression_serveurs') or {}).items()},
+            max_lignes_requete=int(cfg.get('max_lignes_requete', 100000)),
+            max_octets_hote=int(cfg.get('max_octets_hote', 64 * 1024 * 1024)),
+            cache_ttl=float(cfg.get('cache_ttl', 10)),
+            cache_path=str(cfg.get('cache_path', "")),
+            cache_max_entrees=int(cfg.get('cache_max_entrees', 256)),
+            collecte_intervalle=float(cfg.get('collecte_intervalle', 30)),
+            collecte_lignes_initiales=int(cfg.get('collecte_lignes_initiales', 1000)),
+            retention_jours=int(cfg.get('retention_jours', 7)),
+            sante_intervalle=float(cfg.get('sante_intervalle', 15)),
+            sante_timeout=float(cfg.get('sante_timeout', 2)),
+            metriques_dir=str(cfg.get('metriques_dir', "")),
+            metriques_ips=tuple(str(ip) for ip in cfg.get('metriques_ips', ("127.0.0.1", "::1"))),
+            requete_lente=float(cfg.get('requete_lente', 5)),
+            disjoncteur_echecs=int(cfg.get('disjoncteur_echecs', 3)),
+            disjoncteur_delai=float(cfg.get('disjoncteur_delai', 30)),
+            direct_max_flux=int(cfg.get('direct_max_flux', 4)),
+            timeouts_adaptatifs=bool(cfg.get('timeouts_adaptatifs', True)),
+            raw=cfg,
+        )
+
+    def compression_pour(self, host: str) -> str:
+        """Mode de compression à utiliser pour un hôte (réglage par serveur, sinon réglage global)."""
+        return self.compression_serveurs.get(host, self.compression)
+
+
+_cache = {}  # chemin -> (signature du fichier, Settings)
+_cache_lock = Lock()
+
+
+def _signature(stat_result) -> tuple:
+    return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+
+def get_settings(config_path: str = None) -> Settings:
+    """
+    Renvoie les paramètres du fichier de configuration, parsé au plus une fois par version du fichier.
+
+    :param config_path: Chemin du fichier YAML, PATH_CONFIG par défaut
+    :return: Settings
+    """
+    if config_path is None:
+        config_path = os.environ.get('PATH_CONFIG')
+        if not config_path:
+            raise EnvironmentError("La variable d'environnement 'PATH_CONFIG' n'est pas définie.")
+
+    signature = _signature(os.stat(config_path))  # Lève FileNotFoundError si le fichier n'existe pas
+
+    entree = _cache.get(config_path)
+    if entree is not None and entree[0] == signature:
+        return entree[1]
+
+    with _cache_lock:
+        entree = _cache.get(config_path)
+        if entree is not None and entree[0] == signature:
+            return entree[1]
+
+        with open(config_path, 'r') as file:
+            # La signature est prise sur le descripteur ouvert pour correspondre au contenu lu
+            signature = _signature(os.fstat(file.fileno()))
+            settings = Settings.from_dict(yaml.safe_load(file))
+
+        _cache[config_path] = (signature, settings)
+        return settings
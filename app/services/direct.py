@@ -0,0 +1,196 @@
+"""
+Suivi des logs en direct, partagé entre tous les navigateurs d'un même processus.
+
+Pour chaque hôte suivi, un seul canal SSH exécute 'tail -F' (ou 'journalctl -f')
+dans un thread dédié, hors du pool de connexions, puisqu'il reste ouvert tant
+que quelqu'un regarde. Chaque nouvelle ligne est recopiée dans la file de
+chaque abonné. Cette file est bornée : si un navigateur lit moins vite que les
+lignes n'arrivent, les plus anciennes sont écartées et comptées, sans jamais
+ralentir le canal ni les autres abonnés.
+
+Le canal est fermé DELAI_FERMETURE secondes après le départ du dernier abonné
+et rouvert automatiquement après une erreur tant qu'il reste des abonnés.
+
+Le partage se limite au processus : chaque worker Gunicorn (et chaque
+processus qui suit un hôte) ouvre son propre canal. Un hôte suivi depuis N
+workers reçoit donc jusqu'à N connexions 'tail -F'.
+"""
+
+from collections import deque
+from threading import Thread, Lock, Event
+import socket
+import time
+from .configuration import get_settings
+from .services import nouvelle_connexion
+from .compression import verifie_mode, TAILLE_BLOC
+from .journald import commande_journal, parse_entrees
+
+TAILLE_FILE = 1000  # Lignes en attente par abonné, au-delà les plus anciennes sont écartées
+DELAI_FERMETURE = 10  # Secondes sans abonné avant de fermer le canal d'un hôte
+DELAI_RECONNEXION = 5  # Attente (secondes) avant de rouvrir un canal interrompu
+ATTENTE_LECTURE = 1  # Timeout (secondes) de lecture du canal, pour vérifier régulièrement les abonnés
+
+
+def commande_direct(backend: str) -> str:
+    """Commande distante de suivi du journal, autorisée par le filtre installé par setup_client.sh."""
+    if backend == "journald":
+        return commande_journal(0) + " -f"
+    return "sudo tail -n 0 -F /var/log/syslog"
+
+
+class Abonne:
+    """File d'attente d'un navigateur abonné à un ou plusieurs hôtes."""
+
+    def __init__(self, taille: int = TAILLE_FILE):
+        self.lignes = deque(maxlen=taille)  # (hôte, ligne)
+        self.erreurs = deque(maxlen=100)  # (hôte, message)
+        self.perdues = 0
+        self._evenement = Event()
+
+    def pousse(self, hote: str, ligne: str):
+        if len(self.lignes) == self.lignes.maxlen:
+            self.perdues += 1
+        self.lignes.append((hote, ligne))
+        self._evenement.set()
+
+    def signale(self, hote: str, message: str):
+        self.erreurs.append((hote, message))
+        self._evenement.set()
+
+    def attend(self, timeout: float) -> tuple:
+        """
+        Attend de nouvelles lignes au plus `timeout` secondes et vide la file.
+
+        :return: Tuple (lignes, erreurs, nombre de lignes écartées depuis l'appel précédent)
+        """
+        self._evenement.wait(timeout)
+        self._evenement.clear()
+        lignes = [self.lignes.popleft() for _ in range(len(self.lignes))]
+        erreurs = [self.erreurs.popleft() for _ in range(len(self.erreurs))]
+        perdues, self.perdues = self.perdues, 0
+        return lignes, erreurs, perdues
+
+
+class FluxHote(Thread):
+    """Canal SSH de suivi d'un hôte, diffusé à tous ses abonnés."""
+
+    def __init__(self, hote: str, backend: str):
+        super().__init__(name=f"direct-{hote}", daemon=True)
+        self.hote = hote
+        self.backend = backend
+        self.abonnes = set()
+        self.dernier_abonne = time.monotonic()
+
+    def _abonnes(self) -> list:
+        with _flux_lock:
+            return list(self.abonnes)
+
+    def _diffuse(self, lignes: list):
+        for abonne in self._abonnes():
+            for ligne in lignes:
+                abonne.pousse(self.hote, ligne)
+
+    def _signale(self, message: str):
+        for abonne in self._abonnes():
+            abonne.signale(self.hote, message)
+
+    def _doit_s_arreter(self) -> bool:
+        """Retire le flux du registre s'il n'a plus d'abonné depuis DELAI_FERMETURE secondes."""
+        with _flux_lock:
+            if self.abonnes:
+                self.dernier_abonne = time.monotonic()
+                return False
+            if time.monotonic() - self.dernier_abonne < DELAI_FERMETURE:
+                return False
+            _flux.pop((self.hote, self.backend), None)
+            return True
+
+    def _lignes(self, texte: str) -> list:
+        if self.backend == "journald":
+            return [ligne for _, ligne in parse_entrees([texte])]
+        return [texte]
+
+    def _suit(self):
+        """Ouvre le canal et diffuse ses lignes jusqu'à une erreur ou au départ du dernier abonné."""
+        cfg = get_settings()
+        cnx = nouvelle_connexion(self.hote, cfg, verifie_mode(cfg.compression_pour(self.hote)))
+        try:
+            cnx.open()
+            canal = cnx.transport.open_session()
+            canal.settimeout(ATTENTE_LECTURE)
+            canal.exec_command(commande_direct(self.backend))
+            reste = b""
+            while not self._doit_s_arreter():
+                try:
+                    bloc = canal.recv(TAILLE_BLOC)
+                except socket.timeout:
+                    continue
+                if not bloc:
+                    code = canal.recv_exit_status()
+                    raise EOFError(f"Suivi interrompu par l'hôte (code {code}).")
+                morceaux = (reste + bloc).split(b"\n")
+                reste = morceaux.pop()
+                self._diffuse([
+                    ligne
+                    for morceau in morceaux
+                    for ligne in self._lignes(morceau.decode("utf-8", errors="replace").rstrip("\r"))
+                ])
+        finally:
+            cnx.close()
+
+    def run(self):
+        while True:
+            try:
+                self._suit()
+                return  # Plus aucun abonné
+            except Exception as e:
+                self._signale(f"Suivi en direct de {self.hote} interrompu : {e}")
+            # Nouvelle tentative tant que quelqu'un regarde
+            fin = time.monotonic() + DELAI_RECONNEXION
+            while time.monotonic() < fin:
+                if self._doit_s_arreter():
+                    return
+                time.sleep(ATTENTE_LECTURE)
+
+
+_flux = {}  # (hôte, backend) -> FluxHote
+_flux_lock = Lock()
+
+
+def suit_hotes(hotes: list, backend: str = "syslog") -> Abonne:
+    """
+    Abonne un navigateur au suivi en direct des hôtes, en réutilisant les canaux déjà ouverts dans ce processus.
+
+    :param hotes: Liste d'IP ou noms d'hôtes
+    :param backend: 'syslog' ou 'journald'
+    :return: Abonne, à passer à quitte_hotes() quand le navigateur se déconnecte
+    """
+    if backend not in ("syslog", "journald"):
+        raise ValueError(f"Source inconnue : {backend}")
+    abonne = Abonne()
+    with _flux_lock:
+        for hote in hotes:
+            flux = _flux.get((hote, backend))
+            nouveau = flux is None
+            if nouveau:
+                flux = _flux[(hote, backend)] = FluxHote(hote, backend)
+            flux.abonnes.add(abonne)
+            if nouveau:
+                flux.start()
+    return abonne
+
+
+def quitte_hotes(hotes: list, backend: str, abonne: Abonne):
+    """Retire un abonné ; le canal d'un hôte sans abonné est fermé après DELAI_FERMETURE secondes."""
+    with _flux_lock:
+        for hote in hotes:
+            flux = _flux.get((hote, backend))
+            if flux is not None:
+                flux.abonnes.discard(abonne)
+                if not flux.abonnes:
+                    flux.dernier_abonne = time.monotonic()
+
+
+def nombre_canaux() -> int:
+    """Nombre de canaux de suivi ouverts dans ce processus."""
+    return len(_flux)
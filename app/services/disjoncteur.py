@@ -0,0 +1,294 @@
+"""
+Disjoncteur par hôte et timeouts SSH adaptatifs.
+
+Chaque échec de connexion ou d'exécution vers un hôte est compté. Après
+'disjoncteur_echecs' échecs consécutifs, le disjoncteur s'ouvre : pendant
+'disjoncteur_delai' secondes, les récupérations vers cet hôte renvoient
+immédiatement la dernière erreur, sans attendre les timeouts SSH. À l'issue
+du délai, une seule requête (tous workers confondus) est autorisée à sonder
+l'hôte (état semi-ouvert) : un succès referme le disjoncteur, un échec le
+rouvre pour un nouveau délai. Un code de retour non nul de la commande, ou
+une commande interrompue par son timeout, ne compte pas comme un échec :
+l'hôte a répondu.
+
+L'état est partagé par tous les workers Gunicorn (et le collecteur) dans une
+table du fichier SQLite du cache, si bien qu'un hôte détecté en panne par un
+worker est écarté par tous. Seuls les hôtes ayant échoué y ont une ligne :
+un hôte sain ne coûte qu'une lecture par récupération.
+
+Les timeouts de connexion s'adaptent aussi à chaque hôte : à partir des
+durées d'ouverture des connexions observées dans ce processus, ils valent
+MARGE fois le 95e centile, sans descendre sous un plancher ni dépasser la
+valeur configurée, qui reste le maximum. Le timeout des commandes reste celui
+de la configuration : leur durée dépend surtout de la charge demandée (nombre
+de lignes, période), pas de l'hôte.
+"""
+
+from collections import deque
+from datetime import datetime
+from threading import Lock, local
+from typing import NamedTuple
+import sqlite3
+import time
+from .configuration import get_settings
+from .cache import chemin_par_defaut
+
+MARGE = 3  # Timeout adaptatif = MARGE x 95e centile des durées observées
+PLANCHER_CONNEXION = 1  # Timeout minimal (secondes) de connexion, bannière et authentification
+MIN_MESURES = 10  # Nombre de mesures nécessaires avant d'adapter les timeouts
+TAILLE_HISTORIQUE = 100  # Dernières durées d'ouverture conservées par hôte
+DUREE_SONDE = 60  # Au-delà, une sonde semi-ouverte est considérée comme abandonnée (worker tué)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS disjoncteurs (
+    hote TEXT PRIMARY KEY,
+    etat TEXT NOT NULL,
+    echecs INTEGER NOT NULL,
+    erreur TEXT NOT NULL,
+    depuis REAL NOT NULL,
+    reessai REAL NOT NULL,
+    sonde REAL NOT NULL
+);
+"""
+
+FERME, OUVERT, SEMI_OUVERT = "ferme", "ouvert", "semi-ouvert"
+
+
+class Decision(NamedTuple):
+    """Réponse du disjoncteur avant une récupération."""
+    autorise: bool
+    message: str = ""  # Erreur à renvoyer si la récupération est refusée
+    suivi: bool = False  # L'hôte a des échecs enregistrés : un succès doit les effacer
+    sonde: bool = False  # Cette récupération a pris la sonde semi-ouverte
+
+
+class EtatDisjoncteur(NamedTuple):
+    """État d'un hôte ayant échoué, pour l'affichage."""
+    etat: str
+    echecs: int
+    erreur: str
+    depuis: datetime  # Ouverture du disjoncteur, ou premier échec s'il est fermé
+    reessai_dans: float  # Secondes avant la prochaine sonde (0 si fermé ou sonde possible)
+
+
+class Delais(NamedTuple):
+    """Timeouts SSH à appliquer à un hôte (secondes)."""
+    connexion: float
+    banniere: float
+    authentification: float
+    commande: float
+
+
+class Disjoncteur:
+    """Disjoncteurs de tous les hôtes, stockés dans un fichier SQLite partagé entre processus."""
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self._local = local()  # Une connexion SQLite par thread
+        self._schema_pret = False
+
+    def _connexion(self) -> sqlite3.Connection:
+        cnx = getattr(self._local, "cnx", None)
+        if cnx is None:
+            cnx = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+            cnx.execute("PRAGMA journal_mode=WAL")  # Lectures concurrentes pendant les écritures
+            if not self._schema_pret:
+                cnx.executescript(SCHEMA)
+                self._schema_pret = True
+            self._local.cnx = cnx
+        return cnx
+
+    def verifie(self, hote: str) -> Decision:
+        """Indique si une récupération vers l'hôte peut être tentée (et prend la sonde si c'est le moment)."""
+        cnx = self._connexion()
+        ligne = cnx.execute(
+            "SELECT etat, erreur, depuis, reessai, sonde FROM disjoncteurs WHERE hote = ?", (hote,)
+        ).fetchone()
+        if ligne is None:
+            return Decision(True)
+        etat, erreur, depuis, reessai, sonde = ligne
+        if etat == FERME:
+            return Decision(True, suivi=True)
+
+        maintenant = time.time()
+        if (etat == OUVERT and maintenant >= reessai) or (etat == SEMI_OUVERT and maintenant >= sonde):
+            # Un seul processus obtient la sonde : la mise à jour ne réussit que pour le premier
+            curseur = cnx.execute(
+                "UPDATE disjoncteurs SET etat = ?, sonde = ? WHERE hote = ? AND etat = ? AND reessai = ? AND sonde = ?",
+                (SEMI_OUVERT, maintenant + DUREE_SONDE, hote, etat, reessai, sonde)
+            )
+            if curseur.rowcount == 1:
+                return Decision(True, suivi=True, sonde=True)
+
+        attente = max(reessai - maintenant, 0)
+        return Decision(False, (
+            f"{erreur} (hôte écarté depuis {datetime.fromtimestamp(depuis):%H:%M:%S} après plusieurs échecs, "
+            f"nouvel essai {'dans %d s' % attente if attente >= 1 else 'en cours'})"
+        ))
+
+    def libere(self, hote: str):
+        """Rend la sonde semi-ouverte sans résultat : la prochaine récupération pourra la prendre."""
+        self._connexion().execute(
+            "UPDATE disjoncteurs SET sonde = 0 WHERE hote = ? AND etat = ?", (hote, SEMI_OUVERT)
+        )
+
+    def succes(self, hote: str):
+        """Referme le disjoncteur de l'hôte et efface ses échecs."""
+        self._connexion().execute("DELETE FROM disjoncteurs WHERE hote = ?", (hote,))
+
+    def echec(self, hote: str, erreur: str, seuil: int, delai: float):
+        """Compte un échec ; ouvre le disjoncteur au seuil atteint ou si la sonde a échoué."""
+        cnx = self._connexion()
+        maintenant = time.time()
+        cnx.execute("BEGIN IMMEDIATE")
+        try:
+            ligne = cnx.execute("SELECT etat, echecs, depuis FROM disjoncteurs WHERE hote = ?", (hote,)).fetchone()
+            etat, echecs, depuis = ligne if ligne is not None else (FERME, 0, maintenant)
+            echecs += 1
+            reessai = 0
+            if etat != FERME or echecs >= seuil:
+                if etat == FERME:
+                    depuis = maintenant
+                etat, reessai = OUVERT, maintenant + delai
+            cnx.execute(
+                "INSERT OR REPLACE INTO disjoncteurs (hote, etat, echecs, erreur, depuis, reessai, sonde) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)", (hote, etat, echecs, erreur, depuis, reessai)
+            )
+            cnx.execute("COMMIT")
+        except BaseException:
+            cnx.execute("ROLLBACK")
+            raise
+
+    def etats(self) -> dict:
+        """Renvoie {hôte: EtatDisjoncteur} pour tous les hôtes ayant des échecs enregistrés."""
+        maintenant = time.time()
+        return {
+            hote: EtatDisjoncteur(etat, echecs, erreur, datetime.fromtimestamp(depuis),
+                                  max(reessai - maintenant, 0) if etat == OUVERT else 0)
+            for hote, etat, echecs, erreur, depuis, reessai in self._connexion().execute(
+                "SELECT hote, etat, echecs, erreur, depuis, reessai FROM disjoncteurs"
+            )
+        }
+
+
+_disjoncteur = None
+_disjoncteur_lock = Lock()
+
+_durees = {}  # hôte -> deque des dernières durées d'ouverture de connexion réussies
+_durees_lock = Lock()
+
+
+def _get_disjoncteur(settings) -> Disjoncteur:
+    global _disjoncteur
+    chemin = settings.cache_path or chemin_par_defaut()
+    with _disjoncteur_lock:
+        if _disjoncteur is None or _disjoncteur.chemin != chemin:
+            _disjoncteur = Disjoncteur(chemin)
+        return _disjoncteur
+
+
+def verifie_hote(hote: str, settings) -> Decision:
+    """
+    Consulte le disjoncteur de l'hôte avant une récupération.
+
+    Une erreur du fichier partagé (ou de son répertoire) n'empêche jamais la récupération.
+
+    :param settings: Settings (disjoncteur_echecs à 0 désactive le disjoncteur)
+    :return: Decision
+    """
+    if settings.disjoncteur_echecs <= 0:
+        return Decision(True)
+    try:
+        return _get_disjoncteur(settings).verifie(hote)
+    except (sqlite3.Error, OSError):
+        return Decision(True)
+
+
+def signale_succes(hote: str, settings, decision: Decision):
+    """Referme le disjoncteur de l'hôte s'il avait des échecs enregistrés."""
+    if not decision.suivi:
+        return
+    try:
+        _get_disjoncteur(settings).succes(hote)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def libere_sonde(hote: str, settings, decision: Decision):
+    """Rend la sonde prise par une récupération abandonnée avant de joindre l'hôte (ex. pool saturé)."""
+    if not decision.sonde:
+        return
+    try:
+        _get_disjoncteur(settings).libere(hote)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def signale_echec(hote: str, settings, erreur: str):
+    """Enregistre un échec de connexion ou d'exécution (hors timeout de la commande) vers l'hôte."""
+    if settings.disjoncteur_echecs <= 0:
+        return
+    try:
+        _get_disjoncteur(settings).echec(hote, erreur, settings.disjoncteur_echecs, settings.disjoncteur_delai)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def reinitialise_disjoncteur(hote: str):
+    """Referme le disjoncteur d'un hôte (ex. après un test manuel réussi)."""
+    try:
+        _get_disjoncteur(get_settings()).succes(hote)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def etats_disjoncteurs() -> dict:
+    """Renvoie {hôte: EtatDisjoncteur} des hôtes ayant des échecs enregistrés, {} si indisponible."""
+    try:
+        return _get_disjoncteur(get_settings()).etats()
+    except (sqlite3.Error, OSError):
+        return {}
+
+
+def observe_duree(hote: str, duree: float):
+    """Enregistre la durée d'une ouverture de connexion réussie."""
+    with _durees_lock:
+        durees = _durees.get(hote)
+        if durees is None:
+            durees = _durees[hote] = deque(maxlen=TAILLE_HISTORIQUE)
+        durees.append(duree)
+
+
+def centile(hote: str, rang: float = 0.95):
+    """Centile des durées d'ouverture observées pour l'hôte, None s'il y a moins de MIN_MESURES mesures."""
+    with _durees_lock:
+        durees = sorted(_durees.get(hote, ()))
+    if len(durees) < MIN_MESURES:
+        return None
+    return durees[min(int(rang * len(durees)), len(durees) - 1)]
+
+
+def _adapte(valeur, maximum: float) -> float:
+    if valeur is None:
+        return maximum
+    return min(maximum, max(PLANCHER_CONNEXION, MARGE * valeur))
+
+
+def delais_pour(hote: str, settings) -> Delais:
+    """
+    Timeouts SSH à appliquer à l'hôte : connexion, bannière et authentification
+    adaptées à ses durées d'ouverture observées, commande telle que configurée.
+
+    :param settings: Settings (timeouts_adaptatifs à False : valeurs configurées telles quelles)
+    :return: Delais
+    """
+    if not settings.timeouts_adaptatifs:
+        return Delais(settings.ssh_connect_timeout, settings.ssh_banner_timeout,
+                      settings.ssh_auth_timeout, settings.ssh_command_timeout)
+    valeur = centile(hote)
+    return Delais(
+        _adapte(valeur, settings.ssh_connect_timeout),
+        _adapte(valeur, settings.ssh_banner_timeout),
+        _adapte(valeur, settings.ssh_auth_timeout),
+        settings.ssh_command_timeout,
+    )
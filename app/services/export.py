@@ -0,0 +1,75 @@
+"""
+Export des journaux fusionnés, produit au fil de l'eau.
+
+Les LogRecord arrivent déjà triés (fusion k-voies des flux par serveur) et
+sont sérialisés en NDJSON, CSV ou texte brut, puis regroupés en blocs d'environ
+TAILLE_BLOC octets, éventuellement compressés en gzip à la volée. Rien n'est
+conservé d'un bloc à l'autre : la mémoire utilisée ne dépend pas du nombre de
+lignes exportées.
+"""
+
+from io import StringIO
+import csv
+import json
+import zlib
+
+FORMATS = ("ndjson", "csv", "txt")
+TYPES_MIME = {"ndjson": "application/x-ndjson", "csv": "text/csv", "txt": "text/plain"}
+TAILLE_BLOC = 64 * 1024  # Octets accumulés avant chaque envoi au client
+
+
+def _lignes_texte(records, fmt: str):
+    """Sérialise chaque LogRecord en une ligne de texte terminée par un retour à la ligne."""
+    if fmt == "ndjson":
+        for record in records:
+            yield json.dumps(
+                {"timestamp": record.timestamp.isoformat(), "server": record.server, "line": record.line},
+                ensure_ascii=False
+            ) + "\n"
+    elif fmt == "csv":
+        tampon = StringIO()
+        ecrivain = csv.writer(tampon, lineterminator="\n")
+        ecrivain.writerow(("timestamp", "server", "line"))
+        for record in records:
+            ecrivain.writerow((record.timestamp.isoformat(), record.server, record.line))
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate()
+        yield tampon.getvalue()  # En-tête d'un export vide
+    else:
+        for record in records:
+            yield f"{record.timestamp.isoformat()} {record.server} {record.line}\n"
+
+
+def flux_export(records, fmt: str = "ndjson", compresse: bool = False):
+    """
+    Produit l'export des LogRecord donnés, bloc par bloc.
+
+    :param records: Itérable de LogRecord dans l'ordre chronologique (ex. fusionne(...))
+    :param fmt: 'ndjson', 'csv' ou 'txt'
+    :param compresse: Compression gzip à la volée
+    :return: Générateur de blocs d'octets
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, 31) if compresse else None  # wbits=31 : en-tête gzip
+
+    morceaux = []
+    taille = 0
+    for texte in _lignes_texte(records, fmt):
+        morceaux.append(texte)
+        taille += len(texte)
+        if taille >= TAILLE_BLOC:
+            bloc = "".join(morceaux).encode("utf-8")
+            morceaux.clear()
+            taille = 0
+            if compresseur is not None:
+                bloc = compresseur.compress(bloc)
+            if bloc:
+                yield bloc
+
+    bloc = "".join(morceaux).encode("utf-8")
+    if compresseur is not None:
+        bloc = compresseur.compress(bloc) + compresseur.flush()
+    if bloc:
+        yield bloc
@@ -0,0 +1,87 @@
+"""
+Exécution concurrente des récupérations de logs sur plusieurs hôtes.
+
+Chaque hôte est interrogé dans un pool de threads borné et partagé par tout le
+processus. Un délai global est appliqué à la requête : les hôtes qui n'ont pas
+répondu à temps sont signalés en erreur, les autres résultats sont conservés.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextvars import copy_context
+from threading import Lock
+import time
+
+MAX_WORKERS = 16  # Nombre maximum de connexions SSH simultanées par processus
+DEADLINE = 30  # Délai global (secondes) accordé à une requête multi-serveurs
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Renvoie le pool de threads partagé, créé au premier appel."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fanout")
+        return _executor
+
+
+def iter_resultats(appels: dict, deadline: float = DEADLINE):
+    """
+    Lance tous les appels en parallèle et renvoie les résultats au fil de l'eau.
+
+    Chaque appel doit renvoyer un tuple (resultat, code) comme get_syslog.
+
+    :param appels: Dictionnaire {cle: fonction sans argument}
+    :param deadline: Délai global en secondes
+    :return: Générateur de tuples (cle, resultat, erreur), erreur vaut None en cas de succès
+    """
+    executor = get_executor()
+    # Chaque appel s'exécute dans une copie du contexte courant (mesures de la requête en cours)
+    futures = {executor.submit(copy_context().run, fonction): cle for cle, fonction in appels.items()}
+    fin = time.monotonic() + deadline
+    en_attente = set(futures)
+
+    try:
+        while en_attente:
+            restant = fin - time.monotonic()
+            if restant <= 0:
+                break
+            termines, en_attente = wait(en_attente, timeout=restant, return_when=FIRST_COMPLETED)
+            for future in termines:
+                cle = futures[future]
+                try:
+                    resultat, code = future.result()
+                except Exception as e:
+                    yield cle, None, f"Erreur inattendue : {e}"
+                    continue
+                if code == 0:
+                    yield cle, resultat, None
+                else:
+                    yield cle, None, resultat
+    finally:
+        # Les hôtes restants ont dépassé le délai global
+        for future in en_attente:
+            future.cancel()
+
+    for future in en_attente:
+        yield futures[future], None, f"Pas de réponse dans le délai global de {deadline} secondes."
+
+
+def execute_en_parallele(appels: dict, deadline: float = DEADLINE) -> tuple:
+    """
+    Lance tous les appels en parallèle et attend au plus `deadline` secondes.
+
+    :param appels: Dictionnaire {cle: fonction sans argument}
+    :param deadline: Délai global en secondes
+    :return: Tuple (resultats, erreurs), deux dictionnaires indexés par cle
+    """
+    resultats = {}
+    erreurs = {}
+    for cle, resultat, erreur in iter_resultats(appels, deadline):
+        if erreur is None:
+            resultats[cle] = resultat
+        else:
+            erreurs[cle] = erreur
+    return resultats, erreurs
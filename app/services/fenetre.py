@@ -0,0 +1,129 @@
+"""
+Lecture d'une fenêtre de temps du syslog distant.
+
+Le fichier est trié dans le temps : on encadre par dichotomie sur la position
+en octets le début et la fin de la fenêtre, chaque sonde ne lisant qu'un petit
+bloc ('tail -c +N | head -c TAILLE_SONDE'). Seul l'intervalle d'octets trouvé
+est ensuite transféré, si bien que le coût dépend de la taille de la fenêtre et
+non de son ancienneté dans le fichier (environ 2 x log2(taille / TAILLE_SONDE)
+sondes, soit une trentaine pour un fichier de 1 Go).
+
+Seul le fichier courant (/var/log/syslog) est parcouru, pas les fichiers
+archivés par logrotate.
+"""
+
+from collections import deque
+from datetime import datetime
+from .services import execute_commande_octets, execute_commande_lignes
+from .incremental import stat_syslog, SYSLOG
+from .horodatage import parse_lignes
+from .fusion import Horodatees, TRONQUE_LIMITE
+
+TAILLE_SONDE = 4096  # Octets lus par sonde ; la dichotomie s'arrête à cette précision
+
+
+def _sonde(host: str, offset: int, config_path: str = None) -> tuple:
+    """
+    Lit un bloc à partir de `offset` et renvoie le timestamp de la première ligne complète qui en a un.
+
+    :return: Tuple ((timestamp ou None, position du début de cette ligne), 0) ou (message d'erreur, 1)
+    """
+    # Sortie brute : les positions restent exactes en présence de caractères multi-octets
+    donnees, code = execute_commande_octets(host, f"sudo tail -c +{offset + 1} {SYSLOG} | head -c {TAILLE_SONDE}", config_path)
+    if code != 0:
+        return donnees, code
+
+    position = 0
+    if offset > 0:
+        # Le bloc commence probablement au milieu d'une ligne
+        position = donnees.find(b"\n") + 1
+        if position == 0:
+            return (None, offset), 0
+    while True:
+        fin = donnees.find(b"\n", position)
+        if fin == -1:
+            return (None, offset + position), 0  # Dernière ligne incomplète : ignorée
+        timestamp, _ = next(parse_lignes([donnees[position:fin].decode("utf-8", errors="replace")]))
+        if timestamp is not None:
+            return (timestamp, offset + position), 0
+        position = fin + 1
+
+
+def _encadre(host: str, taille: int, avant, bas: int = 0, config_path: str = None) -> tuple:
+    """
+    Encadre par dichotomie la frontière entre les lignes dont le timestamp vérifie `avant` et les suivantes.
+
+    :param avant: Fonction datetime -> bool, vraie pour les lignes situées avant la frontière
+    :param bas: Position de départ connue (toutes les lignes qui commencent avant la vérifient)
+    :return: Tuple ((bas, haut), 0) : les lignes commençant avant `bas` vérifient `avant`, aucune
+             ligne commençant à partir de `haut` ne la vérifie ; ou (message d'erreur, 1)
+    """
+    haut = taille
+    while haut - bas > TAILLE_SONDE:
+        sonde, code = _sonde(host, (bas + haut) // 2, config_path)
+        if code != 0:
+            return sonde, code
+        timestamp, position = sonde
+        if timestamp is None or position >= haut:
+            break  # Aucun timestamp lisible dans ce bloc : l'encadrement actuel reste valable
+        if avant(timestamp):
+            bas = position
+        else:
+            haut = position
+    return (bas, haut), 0
+
+
+def get_syslog_fenetre(host: str, lines: int = 100, config_path: str = None,
+                       since: datetime = None, until: datetime = None) -> tuple:
+    """
+    Récupère les lignes du syslog d'un hôte distant comprises entre deux dates.
+
+    :param host: IP ou nom de l'hôte
+    :param lines: Nombre maximum de lignes renvoyées (les plus récentes de la fenêtre)
+    :param config_path: Chemin du fichier de configuration, PATH_CONFIG par défaut
+    :param since: Date minimale (incluse), début du fichier si None
+    :param until: Date maximale (incluse), fin du fichier si None
+    :return: Tuple (Horodatees, 0) ou (message d'erreur, 1)
+    """
+    stat, code = stat_syslog(host, config_path)
+    if code != 0:
+        return stat, code
+    taille = stat[1]
+
+    debut = 0
+    if since is not None:
+        bornes, code = _encadre(host, taille, lambda ts: ts < since, config_path=config_path)
+        if code != 0:
+            return bornes, code
+        debut = bornes[0]
+
+    fin = taille
+    if until is not None:
+        bornes, code = _encadre(host, taille, lambda ts: ts <= until, bas=debut, config_path=config_path)
+        if code != 0:
+            return bornes, code
+        fin = bornes[1]
+
+    if fin <= debut:
+        return Horodatees(), 0
+
+    brutes, code = execute_commande_lignes(host, f"sudo tail -c +{debut + 1} {SYSLOG} | head -c {fin - debut}", config_path)
+    if code != 0:
+        return brutes, code
+
+    # Filtrage exact aux bords de la fenêtre ; les lignes sans timestamp reprennent celui de la précédente
+    gardees = deque(maxlen=max(int(lines), 1))
+    retenues = 0
+    precedent = datetime.min
+    for timestamp, ligne in parse_lignes(brutes):
+        if timestamp is None:
+            timestamp = precedent
+        else:
+            precedent = timestamp
+        if (since is None or timestamp >= since) and (until is None or timestamp <= until):
+            gardees.append((timestamp, ligne))
+            retenues += 1
+
+    resultat = Horodatees(gardees)
+    resultat.tronque = brutes.tronque or (TRONQUE_LIMITE if retenues > len(gardees) else "")
+    return resultat, 0
@@ -0,0 +1,154 @@
+"""
+Fusion chronologique des logs de plusieurs serveurs.
+
+Le syslog de chaque hôte est déjà trié dans le temps : une fusion k-voies par
+tas (heapq.merge) suffit à obtenir l'ordre global en O(N log k), sans tri
+complet ni liste intermédiaire. Les lignes sont produites à la demande.
+"""
+
+from typing import NamedTuple, Iterator
+from collections import deque
+from operator import attrgetter
+from datetime import datetime
+import heapq
+from .horodatage import parse_lignes
+
+
+class LogRecord(NamedTuple):
+    """Ligne de log horodatée, rattachée à son serveur."""
+    timestamp: datetime
+    server: str
+    line: str
+
+
+COUT_LIGNE = 50  # Surcoût mémoire approximatif d'une chaîne Python, en plus de son texte
+
+# Raisons pour lesquelles les lignes les plus anciennes ont été écartées
+TRONQUE_MEMOIRE = "memoire"  # Budget mémoire 'max_octets_hote' atteint
+TRONQUE_LIMITE = "limite"  # Fenêtre de temps plus longue que le nombre de lignes demandé
+AVERTISSEMENTS = {
+    TRONQUE_MEMOIRE: "seules les lignes les plus récentes ont été conservées (budget mémoire atteint).",
+    TRONQUE_LIMITE: "seules les lignes les plus récentes de la fenêtre ont été conservées (nombre de lignes demandé atteint).",
+}
+
+
+class Lignes(list):
+    """Lignes reçues d'un hôte. `tronque` indique pourquoi les plus anciennes ont été écartées ('' si aucune ne l'a été)."""
+    tronque = ""
+
+    @property
+    def avertissement(self) -> str:
+        """Message affiché lorsque des lignes ont été écartées."""
+        return AVERTISSEMENTS.get(self.tronque, AVERTISSEMENTS[TRONQUE_MEMOIRE])
+
+
+class Horodatees(Lignes):
+    """Liste de tuples (timestamp, ligne) déjà horodatés par la source (ex. journald) : pas d'analyse du texte."""
+
+
+def borne_lignes(lignes, max_octets: int, resultat: Lignes = None) -> Lignes:
+    """
+    Consomme un flux de lignes en ne conservant que les plus récentes dans la limite du budget mémoire.
+
+    Le budget est appliqué au fil de l'eau : la mémoire occupée ne dépasse jamais
+    max_octets, quelle que soit la taille du flux.
+
+    :param lignes: Itérable de lignes (ou de tuples (timestamp, ligne))
+    :param max_octets: Budget mémoire approximatif, 0 pour ne pas borner
+    :param resultat: Liste à remplir (Lignes par défaut)
+    :return: Lignes conservées, tronque valant TRONQUE_MEMOIRE si des lignes ont été écartées
+    """
+    resultat = Lignes() if resultat is None else resultat
+    if not max_octets:
+        resultat.extend(lignes)
+        return resultat
+
+    gardees = deque()
+    taille = 0
+    for ligne in lignes:
+        gardees.append(ligne)
+        taille += len(ligne if isinstance(ligne, str) else ligne[1]) + COUT_LIGNE
+        while taille > max_octets:
+            ancienne = gardees.popleft()
+            taille -= len(ancienne if isinstance(ancienne, str) else ancienne[1]) + COUT_LIGNE
+            resultat.tronque = TRONQUE_MEMOIRE
+    resultat.extend(gardees)
+    return resultat
+
+
+def extract_timestamp(log_line):
+    """
+    Extrait et parse le timestamp d'une ligne de log (ISO 8601 uniquement).
+    Conservée pour compatibilité : iter_records utilise horodatage.parse_lignes.
+    :param log_line: Ligne de log
+    :return: datetime
+    """
+    try:
+        timestamp_str = log_line.split()[0]
+        # Parser avec timezone
+        dt = datetime.fromisoformat(timestamp_str)
+        # Retirer la timezone (convert to naive datetime)
+        return dt.replace(tzinfo=None)
+    except (ValueError, IndexError):
+        return datetime.min
+
+
+def iter_lignes(texte: str):
+    """
+    Parcourt les lignes non vides d'un texte sans construire la liste complète.
+
+    :param texte: Sortie brute d'une commande distante
+    :return: Générateur de lignes
+    """
+    debut = 0
+    while True:
+        fin = texte.find("\n", debut)
+        if fin == -1:
+            ligne = texte[debut:]
+            if ligne:
+                yield ligne
+            return
+        if fin > debut:
+            yield texte[debut:fin]
+        debut = fin + 1
+
+
+def iter_records(server: str, lignes):
+    """
+    Transforme les lignes d'un serveur en LogRecord, dans l'ordre du fichier.
+
+    Une ligne sans timestamp lisible (suite d'un message multi-lignes) reprend
+    celui de la ligne précédente pour ne pas casser l'ordre du flux.
+
+    :param server: Nom du serveur
+    :param lignes: Texte brut, itérable de lignes ou Horodatees
+    :return: Générateur de LogRecord
+    """
+    if isinstance(lignes, Horodatees):
+        for timestamp, ligne in lignes:
+            yield LogRecord(timestamp, server, ligne)
+        return
+
+    if isinstance(lignes, str):
+        lignes = iter_lignes(lignes)
+
+    precedent = datetime.min
+    for timestamp, ligne in parse_lignes(lignes):
+        if timestamp is None:
+            timestamp = precedent
+        else:
+            precedent = timestamp
+        yield LogRecord(timestamp, server, ligne)
+
+
+def fusionne(flux) -> Iterator[LogRecord]:
+    """
+    Fusionne chronologiquement plusieurs flux déjà triés.
+
+    :param flux: Dictionnaire {nom du serveur: texte brut ou itérable de lignes},
+                 ou itérable de flux de LogRecord déjà construits
+    :return: Itérateur de LogRecord dans l'ordre chronologique
+    """
+    if isinstance(flux, dict):
+        flux = [iter_records(server, lignes) for server, lignes in flux.items()]
+    return heapq.merge(*flux, key=attrgetter('timestamp'))
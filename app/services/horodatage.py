@@ -0,0 +1,193 @@
+"""
+Analyse rapide des timestamps syslog.
+
+Formats reconnus :
+- ISO 8601 / RFC 3339 (format par défaut de rsyslog récent) : 2025-10-18T12:00:01.123456+02:00
+- RFC 5424 : <34>1 2025-10-18T12:00:01.003Z host app ...
+- RFC 3164 (format classique) : Oct 18 12:00:01 host app ...
+
+Le format est détecté une fois par hôte, puis seul le préfixe de chaque ligne
+est analysé. Pour le RFC 3164, la conversion à la seconde près est mise en
+cache : les lignes d'une même seconde ne coûtent qu'un découpage de chaîne.
+Pour l'ISO 8601, la partie sans fuseau est lue par fromisoformat et le
+décalage vers l'heure locale du serveur de monitoring est mis en cache par
+heure et par fuseau (datetime naïf), ce qui permet de fusionner des hôtes
+situés dans des fuseaux différents.
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+import time
+
+TAILLE_CACHE = 4096
+
+_annee = (0.0, datetime.now().year)  # (date de la prochaine vérification, année courante)
+
+MOIS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+
+
+_decalages = {}  # AAAA-MM-JJTHH + fuseau ('Z', '+02:00'...) -> décalage vers l'heure locale
+_fromisoformat = datetime.fromisoformat
+
+
+def _decalage(cle: str, champ: str) -> timedelta:
+    """Décalage entre le fuseau du champ et l'heure locale, calculé une fois par heure et par fuseau."""
+    dt = _fromisoformat(champ)
+    decalage = dt.astimezone().replace(tzinfo=None) - dt.replace(tzinfo=None)
+    if len(_decalages) >= TAILLE_CACHE:
+        _decalages.clear()
+    _decalages[cle] = decalage
+    return decalage
+
+
+@lru_cache(maxsize=TAILLE_CACHE)
+def _seconde_rfc3164(prefixe: str, annee: int) -> datetime:
+    """Convertit 'Mmm JJ HH:MM:SS' en datetime, l'année étant déduite de la date courante."""
+    mois = MOIS[prefixe[0:3]]
+    dt = datetime(annee, mois, int(prefixe[4:6]), int(prefixe[7:9]), int(prefixe[10:12]), int(prefixe[13:15]))
+    # Une date dans le futur correspond à l'année précédente (ex. lignes de décembre lues en janvier)
+    if dt > datetime.now() + timedelta(days=1):
+        dt = dt.replace(year=annee - 1)
+    return dt
+
+
+def _parse_champ_iso(champ: str):
+    """
+    Analyse un champ ISO 8601 déjà isolé. Renvoie None s'il ne s'agit pas d'un timestamp.
+
+    Le fuseau est séparé à la main : seule la partie naïve passe par fromisoformat,
+    puis le décalage mis en cache (par heure et par fuseau) est ajouté. On évite
+    ainsi de construire un datetime avec fuseau, bien plus coûteux à convertir.
+    """
+    n = len(champ)
+    if n < 19 or champ[10] != "T":
+        return None
+    # Fuseau : 'Z', '+HH:MM' ou '+HHMM' en fin de champ, absent pour une heure locale
+    if champ[-1] == "Z":
+        fuseau = n - 1
+    elif champ[-3] == ":" and champ[-6] in "+-":
+        fuseau = n - 6
+    elif champ[-5] in "+-":
+        fuseau = n - 5
+    else:
+        fuseau = n
+    try:
+        dt = _fromisoformat(champ[:fuseau])  # Implémenté en C : plus rapide que tout découpage en Python
+        if fuseau == n:
+            return dt
+        # Les changements d'heure ont lieu à l'heure pile : le décalage est constant sur une heure
+        cle = champ[:13] + champ[fuseau:]
+        decalage = _decalages.get(cle)
+        if decalage is None:
+            decalage = _decalage(cle, champ)
+    except ValueError:
+        return None
+    return dt + decalage if decalage else dt
+
+
+def parse_iso(ligne: str):
+    """Analyse le timestamp ISO 8601 en tête de ligne. Renvoie None s'il est absent."""
+    fin = ligne.find(" ")
+    return _parse_champ_iso(ligne if fin == -1 else ligne[:fin])
+
+
+def parse_rfc5424(ligne: str):
+    """Analyse le timestamp d'une ligne RFC 5424 ('<PRI>1 TIMESTAMP ...'). Renvoie None s'il est absent."""
+    if ligne[:1] != "<":
+        return None
+    debut = ligne.find(">1 ")
+    if debut == -1:
+        return None
+    debut += 3
+    fin = ligne.find(" ", debut)
+    return _parse_champ_iso(ligne[debut:] if fin == -1 else ligne[debut:fin])
+
+
+def _annee_courante() -> int:
+    """Année courante, relue au plus une fois par minute (évite un datetime.now() par ligne)."""
+    global _annee
+    maintenant = time.monotonic()
+    if maintenant >= _annee[0]:
+        _annee = (maintenant + 60, datetime.now().year)
+    return _annee[1]
+
+
+def parse_rfc3164(ligne: str):
+    """Analyse le timestamp RFC 3164 ('Oct 18 12:00:01') en tête de ligne. Renvoie None s'il est absent."""
+    if len(ligne) < 15 or ligne[3] != " " or ligne[9] != ":" or ligne[12] != ":":
+        return None
+    try:
+        return _seconde_rfc3164(ligne[:15], _annee_courante())
+    except (KeyError, ValueError):
+        return None
+
+
+PARSEURS = (parse_iso, parse_rfc5424, parse_rfc3164)
+
+
+def detecte_format(ligne: str):
+    """Renvoie la fonction d'analyse adaptée à la ligne, ou None si aucun format n'est reconnu."""
+    for parseur in PARSEURS:
+        if parseur(ligne) is not None:
+            return parseur
+    return None
+
+
+def parse_timestamp(ligne: str):
+    """
+    Analyse le timestamp d'une ligne isolée, quel que soit son format.
+
+    :param ligne: Ligne de log
+    :return: datetime naïf en heure locale, ou None
+    """
+    for parseur in PARSEURS:
+        dt = parseur(ligne)
+        if dt is not None:
+            return dt
+    return None
+
+
+def parse_lignes(lignes):
+    """
+    Analyse toutes les lignes d'un même hôte en détectant le format une seule fois.
+
+    :param lignes: Itérable de lignes
+    :return: Générateur de tuples (datetime ou None, ligne)
+    """
+    parseur = None
+    champ_iso = _parse_champ_iso
+    for ligne in lignes:
+        if parseur is parse_iso:
+            # Chemin le plus fréquent, déroulé pour éviter un appel de fonction par ligne
+            fin = ligne.find(" ")
+            dt = champ_iso(ligne[:fin] if fin != -1 else ligne)
+        elif parseur is not None:
+            dt = parseur(ligne)
+        else:
+            dt = None
+
+        if dt is None:
+            # Première ligne, ligne de continuation ou changement de format : détection complète
+            for candidat in PARSEURS:
+                dt = candidat(ligne)
+                if dt is not None:
+                    parseur = candidat
+                    break
+        yield dt, ligne
+
+
+def fin_prefixe(ligne: str) -> int:
+    """Renvoie la position du premier caractère suivant le timestamp (0 si la ligne n'en a pas)."""
+    parseur = detecte_format(ligne)
+    if parseur is parse_iso:
+        fin = ligne.find(" ")
+        return len(ligne) if fin == -1 else fin + 1
+    if parseur is parse_rfc5424:
+        fin = ligne.find(" ", ligne.find(">1 ") + 3)
+        return len(ligne) if fin == -1 else fin + 1
+    if parseur is parse_rfc3164:
+        return 16
+    return 0
@@ -0,0 +1,145 @@
+"""
+Récupération incrémentale du syslog.
+
+Pour chaque hôte, on mémorise un curseur (inode + position en octets dans
+/var/log/syslog). Les appels suivants ne transfèrent que les octets ajoutés
+depuis le dernier appel, qui viennent alimenter un tampon circulaire borné des
+lignes récentes. Une rotation du fichier (inode différent ou fichier plus
+court que le curseur) provoque une relecture complète des n dernières lignes.
+
+L'état est propre au processus : chaque worker Gunicorn a ses propres curseurs.
+"""
+
+from collections import deque
+from itertools import islice
+from threading import Lock
+from .services import execute_commande, execute_commande_octets, execute_commande_lignes
+
+SYSLOG = "/var/log/syslog"
+TAILLE_TAMPON = 5000  # Nombre de lignes conservées par hôte
+MAX_OCTETS_INCREMENT = 8 * 1024 * 1024  # Au-delà, on relit simplement les n dernières lignes
+
+
+class EtatHote:
+    """Curseur et tampon des lignes récentes d'un hôte."""
+    __slots__ = ("inode", "offset", "lignes", "complet", "lock")
+
+    def __init__(self):
+        self.inode = None
+        self.offset = 0
+        self.lignes = deque(maxlen=TAILLE_TAMPON)
+        self.complet = False  # True si le tampon contient le fichier entier
+        self.lock = Lock()
+
+
+_etats = {}
+_etats_lock = Lock()
+
+
+def _etat(host: str) -> EtatHote:
+    with _etats_lock:
+        etat = _etats.get(host)
+        if etat is None:
+            etat = _etats[host] = EtatHote()
+        return etat
+
+
+def reinitialise_curseur(host: str):
+    """Oublie le curseur et le tampon d'un hôte (changement d'IP, suppression)."""
+    with _etats_lock:
+        _etats.pop(host, None)
+
+
+def stat_syslog(host: str, config_path: str = None) -> tuple:
+    """Renvoie ((inode, taille), 0) pour le syslog distant, ou (message, 1) en cas d'erreur."""
+    sortie, code = execute_commande(host, f"stat -c %i:%s {SYSLOG}", config_path)
+    if code != 0:
+        return sortie, code
+    try:
+        inode, taille = sortie.strip().split(":")
+        return (int(inode), int(taille)), 0
+    except ValueError:
+        return f"Réponse inattendue de stat sur {host}: {sortie.strip()!r}", 1
+
+
+def _rafraichit(etat: EtatHote, host: str, lines: int, config_path: str = None) -> tuple:
+    """
+    Met à jour le tampon de l'hôte. Doit être appelé avec etat.lock acquis.
+
+    :return: Tuple ((lignes ajoutées au tampon, relecture complète ou non), 0) ou (message d'erreur, 1)
+    """
+    stat, code = stat_syslog(host, config_path)
+    if code != 0:
+        return stat, code
+    inode, taille = stat
+
+    rotation = etat.inode != inode or taille < etat.offset
+    trop_court = lines > len(etat.lignes) and not etat.complet
+    if rotation or trop_court or taille - etat.offset > MAX_OCTETS_INCREMENT:
+        # Première lecture, rotation, tampon insuffisant ou retard trop important : relecture complète.
+        # Les lignes écrites entre le stat et le tail pourront être relues une fois au prochain appel.
+        nouvelles, code = execute_commande_lignes(host, f"sudo tail -n {lines} {SYSLOG}", config_path)
+        if code != 0:
+            return nouvelles, code
+        etat.lignes = deque(nouvelles, maxlen=max(TAILLE_TAMPON, lines))
+        etat.complet = len(etat.lignes) < lines
+        etat.inode = inode
+        etat.offset = taille
+        return (nouvelles, True), 0
+
+    if taille == etat.offset:
+        return ([], False), 0
+
+    # On borne la lecture à la taille observée pour garder un curseur exact (sortie brute, comptée en octets)
+    sortie, code = execute_commande_octets(
+        host, f"sudo tail -c +{etat.offset + 1} {SYSLOG} | head -c {taille - etat.offset}", config_path
+    )
+    if code != 0:
+        return sortie, code
+
+    # Une éventuelle ligne incomplète sera relue au prochain appel
+    fin = sortie.rfind(b"\n") + 1
+    nouvelles = [ligne for ligne in sortie[:fin].decode("utf-8", errors="replace").split("\n") if ligne]
+    etat.lignes.extend(nouvelles)
+    etat.complet = etat.complet and len(etat.lignes) < etat.lignes.maxlen
+    etat.offset += fin
+    return (nouvelles, False), 0
+
+
+def get_syslog_incremental(host: str, lines: int = 100, config_path: str = None) -> tuple:
+    """
+    Récupère les n dernières lignes du syslog en ne transférant que les nouveaux octets.
+
+    :param host: IP ou nom de l'hôte
+    :param lines: Nombre de lignes à renvoyer
+    :param config_path: Chemin du fichier de configuration, PATH_CONFIG par défaut
+    :return: Tuple (liste des lignes, 0) ou (message d'erreur, 1)
+    """
+    lines = int(lines)
+    etat = _etat(host)
+
+    # Un seul rafraîchissement à la fois par hôte : les requêtes concurrentes profitent du même transfert
+    with etat.lock:
+        resultat, code = _rafraichit(etat, host, lines, config_path)
+        if code != 0:
+            return resultat, code
+
+        debut = max(len(etat.lignes) - lines, 0)
+        return list(islice(etat.lignes, debut, None)), 0
+
+
+def get_nouvelles_lignes(host: str, lines: int = 1000, config_path: str = None) -> tuple:
+    """
+    Renvoie uniquement les lignes apparues depuis l'appel précédent (les n dernières au premier appel).
+
+    Lors d'une relecture complète (premier appel, rotation, retard trop important),
+    les lignes renvoyées peuvent avoir déjà été lues : l'appelant doit alors les dédoublonner.
+
+    :param host: IP ou nom de l'hôte
+    :param lines: Nombre de lignes lues lors d'une relecture complète
+    :param config_path: Chemin du fichier de configuration, PATH_CONFIG par défaut
+    :return: Tuple ((liste des nouvelles lignes, relecture complète ou non), 0) ou (message d'erreur, 1)
+    """
+    etat = _etat(host)
+    with etat.lock:
+        return _rafraichit(etat, host, int(lines), config_path)
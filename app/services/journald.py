@@ -0,0 +1,103 @@
+"""
+Récupération des logs via journald (journalctl --output=json).
+
+Les filtres (période, unité systemd, priorité) sont appliqués sur l'hôte
+distant : seules les entrées demandées traversent le réseau, et elles arrivent
+déjà structurées (timestamp en microsecondes, unité, priorité), sans analyse du
+texte de notre côté.
+"""
+
+from datetime import datetime
+import json
+import re
+import shlex
+from .services import execute_commande_lignes
+from .fusion import Horodatees
+
+# Seuls les champs affichés sont transférés (__REALTIME_TIMESTAMP est toujours inclus)
+CHAMPS = "MESSAGE,PRIORITY,_SYSTEMD_UNIT,SYSLOG_IDENTIFIER,_PID,_HOSTNAME"
+
+PRIORITES = ("emerg", "alert", "crit", "err", "warning", "notice", "info", "debug")
+
+_re_unite = re.compile(r"^[\w@.:-]{1,128}$")
+_re_priorite = re.compile(r"^([0-7]|%s)(\.\.([0-7]|%s))?$" % ("|".join(PRIORITES), "|".join(PRIORITES)))
+
+
+def commande_journal(lines: int, since: datetime = None, until: datetime = None,
+                     unite: str = None, priorite: str = None) -> str:
+    """
+    Construit la commande journalctl. Lève ValueError si un filtre est invalide.
+
+    :param lines: Nombre maximum d'entrées (les plus récentes)
+    :param since: Date minimale
+    :param until: Date maximale
+    :param unite: Unité systemd (ex. ssh.service)
+    :param priorite: Priorité maximale ou intervalle (ex. 'err', '0..3')
+    """
+    morceaux = [f"sudo journalctl --no-pager --output=json --output-fields={CHAMPS} -n {int(lines)}"]
+    if since:
+        morceaux.append(f"--since {shlex.quote(since.strftime('%Y-%m-%d %H:%M:%S'))}")
+    if until:
+        morceaux.append(f"--until {shlex.quote(until.strftime('%Y-%m-%d %H:%M:%S'))}")
+    if unite:
+        if not _re_unite.match(unite):
+            raise ValueError(f"Unité systemd invalide : {unite}")
+        morceaux.append(f"-u {unite}")
+    if priorite:
+        if not _re_priorite.match(priorite):
+            raise ValueError(f"Priorité invalide : {priorite}")
+        morceaux.append(f"-p {priorite}")
+    return " ".join(morceaux)
+
+
+def _texte(valeur) -> str:
+    """journald encode les messages non UTF-8 sous forme de liste d'octets."""
+    if isinstance(valeur, list):
+        return bytes(valeur).decode("utf-8", errors="replace")
+    return "" if valeur is None else str(valeur)
+
+
+def parse_entrees(sortie) -> Horodatees:
+    """
+    Convertit la sortie JSON de journalctl (texte ou liste de lignes, une entrée par ligne) en lignes horodatées.
+
+    Les lignes sont mises en forme comme dans /var/log/syslog pour l'affichage et la recherche.
+    """
+    entrees = Horodatees()
+    entrees.tronque = getattr(sortie, "tronque", "")
+    if isinstance(sortie, str):
+        sortie = sortie.split("\n")
+    for brut in sortie:
+        if not brut:
+            continue
+        try:
+            entree = json.loads(brut)
+            us = int(entree["__REALTIME_TIMESTAMP"])
+        except (ValueError, KeyError):
+            continue
+
+        timestamp = datetime.fromtimestamp(us // 1_000_000).replace(microsecond=us % 1_000_000)
+        ident = _texte(entree.get("SYSLOG_IDENTIFIER") or entree.get("_SYSTEMD_UNIT") or "-")
+        pid = entree.get("_PID")
+        source = f"{ident}[{_texte(pid)}]" if pid else ident
+        ligne = f"{timestamp.isoformat()} {_texte(entree.get('_HOSTNAME'))} {source}: {_texte(entree.get('MESSAGE'))}"
+        entrees.append((timestamp, ligne))
+    return entrees
+
+
+def get_journal(host: str, lines: int = 100, config_path: str = None, since: datetime = None,
+                until: datetime = None, unite: str = None, priorite: str = None) -> tuple:
+    """
+    Récupère les entrées journald d'un hôte distant, filtrées côté hôte.
+
+    :return: Tuple (Horodatees, 0) ou (message d'erreur, 1)
+    """
+    try:
+        commande = commande_journal(lines, since, until, unite, priorite)
+    except ValueError as e:
+        return str(e), 1
+
+    sortie, code = execute_commande_lignes(host, commande, config_path)
+    if code != 0:
+        return sortie, code
+    return parse_entrees(sortie), 0
@@ -0,0 +1,315 @@
+"""
+Métriques de performance du chargement des journaux, au format texte Prometheus.
+
+Chaque étape du chemin critique est chronométrée par hôte :
+- connexion : emprunt d'une connexion au pool SSH (ouverture comprise si besoin) ;
+- commande : exécution distante et transfert de la sortie ;
+- analyse : extraction des timestamps (iter_records) ;
+- rendu : fusion chronologique et rendu du template (les deux sont entrelacés,
+  la fusion étant paresseuse).
+S'y ajoutent les octets et lignes reçus, les erreurs par classe et la durée
+totale des requêtes.
+
+Chaque processus (worker Gunicorn, collecteur) accumule ses mesures en mémoire
+et les écrit régulièrement dans un fichier JSON qui lui est propre, dans un
+répertoire privé (0700) ; l'endpoint /metrics additionne les fichiers de tous
+les processus. Les fichiers des processus terminés sont fusionnés dans un
+total unique, pour que le répertoire ne grossisse pas à chaque redémarrage. Les mesures de la
+requête en cours sont aussi conservées dans une ContextVar (propagée aux
+threads du fan-out) pour journaliser le détail des requêtes lentes.
+"""
+
+from contextvars import ContextVar
+from threading import Lock
+import fcntl
+import glob
+import json
+import os
+import tempfile
+import time
+from .cache import repertoire_prive
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Bornes des histogrammes (secondes)
+INTERVALLE_ECRITURE = 1  # Période minimale (secondes) entre deux écritures du fichier d'un processus
+FICHIER_MORTS = "morts.json"  # Totaux cumulés des processus terminés
+
+DESCRIPTIONS = {
+    "monitoring_etape_duree_secondes": ("histogram", "Durée des étapes du chargement des journaux, par hôte"),
+    "monitoring_requete_duree_secondes": ("histogram", "Durée totale des requêtes HTTP, par route"),
+    "monitoring_octets_recus_total": ("counter", "Octets reçus des hôtes (avant décompression)"),
+    "monitoring_lignes_recues_total": ("counter", "Lignes de logs reçues des hôtes"),
+    "monitoring_erreurs_total": ("counter", "Erreurs de récupération, par hôte et par classe"),
+    "monitoring_disjoncteur_rejets_total": ("counter", "Récupérations refusées sans connexion (hôte écarté par le disjoncteur)"),
+}
+
+_compteurs = {}  # (nom, labels) -> valeur
+_histogrammes = {}  # (nom, labels) -> [effectifs par tranche (+Inf en dernier), somme, nombre]
+_lock = Lock()
+_derniere_ecriture = 0.0
+
+# Mesures de la requête HTTP en cours : liste de (étape, hôte, durée), None hors requête
+mesures_requete: ContextVar = ContextVar("mesures_requete", default=None)
+
+
+def _labels(**labels) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def incremente(nom: str, valeur: float = 1, **labels):
+    """Ajoute `valeur` au compteur `nom` pour le jeu de labels donné."""
+    cle = (nom, _labels(**labels))
+    with _lock:
+        _compteurs[cle] = _compteurs.get(cle, 0) + valeur
+
+
+def observe(nom: str, duree: float, **labels):
+    """Enregistre une durée (secondes) dans l'histogramme `nom`."""
+    cle = (nom, _labels(**labels))
+    with _lock:
+        histo = _histogrammes.get(cle)
+        if histo is None:
+            histo = _histogrammes[cle] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        i = 0
+        while i < len(BUCKETS) and duree > BUCKETS[i]:
+            i += 1
+        histo[0][i] += 1
+        histo[1] += duree
+        histo[2] += 1
+
+
+def observe_etape(etape: str, hote: str, duree: float):
+    """Enregistre la durée d'une étape pour un hôte, et l'ajoute au détail de la requête en cours."""
+    observe("monitoring_etape_duree_secondes", duree, etape=etape, hote=hote)
+    mesures = mesures_requete.get()
+    if mesures is not None:
+        mesures.append((etape, hote, duree))
+
+
+def compte_erreur(hote: str, classe: str):
+    """Compte une erreur de récupération (classe d'exception, ou 'CommandeEchouee')."""
+    incremente("monitoring_erreurs_total", hote=hote, classe=classe)
+
+
+def chronometre_iter(iterable, etape: str, hote: str = ""):
+    """
+    Parcourt un itérable en chronométrant uniquement le temps passé à produire ses éléments.
+
+    Le temps passé par le consommateur entre deux éléments n'est pas compté, ce qui
+    permet de mesurer une étape paresseuse (ex. l'analyse des lignes) consommée
+    par une autre (la fusion, le rendu). La durée est enregistrée à la fin du parcours.
+    """
+    chrono = time.perf_counter
+    iterateur = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            debut = chrono()
+            try:
+                element = next(iterateur)
+            except StopIteration:
+                total += chrono() - debut
+                return
+            total += chrono() - debut
+            yield element
+    finally:
+        observe_etape(etape, hote, total)
+
+
+def compte_octets(blocs, hote: str):
+    """Relaie les blocs reçus d'un hôte en comptant leur taille."""
+    total = 0
+    try:
+        for bloc in blocs:
+            total += len(bloc)
+            yield bloc
+    finally:
+        incremente("monitoring_octets_recus_total", total, hote=hote)
+
+
+def repertoire_par_defaut() -> str:
+    return os.path.join(tempfile.gettempdir(), f"monitoring_metriques_{os.getuid()}")
+
+
+def _repertoire() -> str:
+    from .configuration import get_settings
+    try:
+        return get_settings().metriques_dir or repertoire_par_defaut()
+    except (EnvironmentError, OSError):
+        return repertoire_par_defaut()
+
+
+def _serialise(compteurs: dict, histogrammes: dict) -> dict:
+    return {
+        "compteurs": [[nom, labels, valeur] for (nom, labels), valeur in compteurs.items()],
+        "histogrammes": [[nom, labels, list(h[0]), h[1], h[2]] for (nom, labels), h in histogrammes.items()],
+    }
+
+
+def _instantane() -> dict:
+    with _lock:
+        return _serialise(_compteurs, _histogrammes)
+
+
+def _ecrit_json(chemin: str, contenu: dict):
+    """Écrit via un fichier temporaire renommé, pour qu'un lecteur ne voie jamais un fichier incomplet."""
+    with open(chemin + ".tmp", "w") as fichier:
+        json.dump(contenu, fichier)
+    os.replace(chemin + ".tmp", chemin)
+
+
+def _lit_json(chemin: str):
+    """Contenu d'un fichier de métriques, ou None s'il est absent ou illisible."""
+    try:
+        with open(chemin) as fichier:
+            return json.load(fichier)
+    except (OSError, ValueError):
+        return None
+
+
+def _ajoute(compteurs: dict, histogrammes: dict, contenu: dict):
+    """Ajoute le contenu d'un fichier de métriques aux totaux."""
+    for nom, labels, valeur in contenu.get("compteurs", []):
+        cle = (nom, tuple(map(tuple, labels)))
+        compteurs[cle] = compteurs.get(cle, 0) + valeur
+    for nom, labels, effectifs, somme, nombre in contenu.get("histogrammes", []):
+        cle = (nom, tuple(map(tuple, labels)))
+        histo = histogrammes.setdefault(cle, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+        for i, effectif in enumerate(effectifs[:len(BUCKETS) + 1]):
+            histo[0][i] += effectif
+        histo[1] += somme
+        histo[2] += nombre
+
+
+def _vivant(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # Processus d'un autre utilisateur : il existe
+        return True
+    return True
+
+
+def ecrit(force: bool = False):
+    """
+    Écrit les métriques du processus dans son fichier (au plus une fois par INTERVALLE_ECRITURE).
+
+    Les erreurs d'écriture (dont un répertoire qui n'est pas privé) sont ignorées :
+    les métriques ne doivent pas faire échouer une requête.
+    """
+    global _derniere_ecriture
+    maintenant = time.monotonic()
+    if not force and maintenant - _derniere_ecriture < INTERVALLE_ECRITURE:
+        return
+    _derniere_ecriture = maintenant
+
+    repertoire = _repertoire()
+    try:
+        os.makedirs(os.path.dirname(repertoire), exist_ok=True)
+        repertoire_prive(repertoire)
+        _ecrit_json(os.path.join(repertoire, f"{os.getpid()}.json"), _instantane())
+    except OSError:
+        pass
+
+
+def _fusionne_morts(repertoire: str):
+    """
+    Fusionne les fichiers des processus terminés dans FICHIER_MORTS, puis les supprime.
+
+    Les compteurs restent ainsi cumulatifs d'un redémarrage de worker à l'autre sans
+    qu'un fichier par PID s'accumule. Un verrou évite que deux workers servant
+    /metrics en même temps ne comptent deux fois le même fichier.
+    """
+    termines = []
+    for chemin in glob.glob(os.path.join(repertoire, "*.json")):
+        pid = os.path.basename(chemin)[:-len(".json")]
+        if pid.isdigit() and not _vivant(int(pid)):
+            termines.append(chemin)
+    if not termines:
+        return
+
+    with open(os.path.join(repertoire, FICHIER_MORTS + ".lock"), "w") as verrou:
+        fcntl.flock(verrou, fcntl.LOCK_EX)
+        compteurs = {}
+        histogrammes = {}
+        _ajoute(compteurs, histogrammes, _lit_json(os.path.join(repertoire, FICHIER_MORTS)) or {})
+        fusionnes = []
+        for chemin in termines:
+            contenu = _lit_json(chemin)
+            if contenu is None:  # Déjà fusionné par un autre worker
+                continue
+            _ajoute(compteurs, histogrammes, contenu)
+            fusionnes.append(chemin)
+        if fusionnes:
+            _ecrit_json(os.path.join(repertoire, FICHIER_MORTS), _serialise(compteurs, histogrammes))
+            for chemin in fusionnes:
+                os.remove(chemin)
+
+
+def agrege() -> tuple:
+    """
+    Additionne les métriques de tous les processus (fichiers du répertoire partagé).
+
+    Les processus terminés sont comptés via FICHIER_MORTS : les compteurs restent
+    cumulatifs d'un redémarrage de worker à l'autre.
+
+    :return: Tuple (compteurs, histogrammes) au même format que l'état en mémoire
+    """
+    ecrit(force=True)
+    compteurs = {}
+    histogrammes = {}
+    try:
+        repertoire = repertoire_prive(_repertoire())
+        _fusionne_morts(repertoire)
+    except OSError:
+        return compteurs, histogrammes
+    for chemin in glob.glob(os.path.join(repertoire, "*.json")):
+        contenu = _lit_json(chemin)
+        if contenu is not None:
+            _ajoute(compteurs, histogrammes, contenu)
+    return compteurs, histogrammes
+
+
+def _echappe(valeur: str) -> str:
+    return valeur.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels, *supplementaires) -> str:
+    paires = list(labels) + list(supplementaires)
+    if not paires:
+        return ""
+    return "{" + ",".join(f'{k}="{_echappe(v)}"' for k, v in paires) + "}"
+
+
+def format_prometheus() -> str:
+    """Renvoie les métriques agrégées de tous les processus au format texte Prometheus."""
+    compteurs, histogrammes = agrege()
+    lignes = []
+    for nom, (type_metrique, aide) in DESCRIPTIONS.items():
+        lignes.append(f"# HELP {nom} {aide}")
+        lignes.append(f"# TYPE {nom} {type_metrique}")
+        if type_metrique == "counter":
+            for (n, labels), valeur in sorted(compteurs.items()):
+                if n == nom:
+                    lignes.append(f"{nom}{_format_labels(labels)} {valeur:g}")
+        else:
+            for (n, labels), (effectifs, somme, nombre) in sorted(histogrammes.items()):
+                if n != nom:
+                    continue
+                cumul = 0
+                for borne, effectif in zip(BUCKETS, effectifs):
+                    cumul += effectif
+                    lignes.append(f"{nom}_bucket{_format_labels(labels, ('le', f'{borne:g}'))} {cumul}")
+                lignes.append(f"{nom}_bucket{_format_labels(labels, ('le', '+Inf'))} {nombre}")
+                lignes.append(f"{nom}_sum{_format_labels(labels)} {somme:.6f}")
+                lignes.append(f"{nom}_count{_format_labels(labels)} {nombre}")
+    return "\n".join(lignes) + "\n"
+
+
+def detail_requete(mesures: list) -> dict:
+    """Regroupe les mesures d'une requête en {étape: {hôte: durée cumulée en ms}}."""
+    detail = {}
+    for etape, hote, duree in mesures:
+        par_hote = detail.setdefault(etape, {})
+        par_hote[hote or "-"] = round(par_hote.get(hote or "-", 0) + duree * 1000, 1)
+    return detail
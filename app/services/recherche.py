@@ -0,0 +1,50 @@
+"""
+Découpage des lignes de log en jetons pour l'index inversé, et analyse des
+requêtes de recherche (termes et "phrases exactes").
+"""
+
+import re
+from .horodatage import fin_prefixe
+
+TAILLE_MIN_JETON = 2
+TAILLE_MAX_JETON = 64  # Doit correspondre à la taille de la colonne log_tokens.token
+
+_re_jeton = re.compile(r"\w+")
+_re_phrase = re.compile(r'"([^"]+)"')
+
+
+def corps_ligne(ligne: str) -> str:
+    """Retire le timestamp en tête de ligne, pour ne pas indexer les dates."""
+    return ligne[fin_prefixe(ligne):]
+
+
+def tokenise(texte: str) -> set:
+    """
+    Découpe un texte en jetons normalisés (minuscules, sans doublon).
+
+    :param texte: Ligne de log ou terme recherché
+    :return: Ensemble de jetons
+    """
+    return {
+        jeton for jeton in _re_jeton.findall(texte.lower())
+        if TAILLE_MIN_JETON <= len(jeton) <= TAILLE_MAX_JETON
+    }
+
+
+def analyse_requete(requete: str) -> tuple:
+    """
+    Analyse une requête de recherche.
+
+    Les passages entre guillemets sont des phrases exactes, le reste des termes
+    devant tous apparaître dans la ligne.
+
+    :param requete: Texte saisi par l'utilisateur, ex. 'sshd "Failed password"'
+    :return: Tuple (jetons à chercher dans l'index, phrases à vérifier en minuscules)
+    """
+    phrases = [phrase.strip().lower() for phrase in _re_phrase.findall(requete) if phrase.strip()]
+    reste = _re_phrase.sub(" ", requete)
+
+    jetons = tokenise(reste)
+    for phrase in phrases:
+        jetons |= tokenise(phrase)
+    return jetons, phrases
@@ -0,0 +1,181 @@
+"""
+Regroupement des lignes de logs répétitives.
+
+Chaque ligne est réduite à un gabarit : le préfixe syslog (date, hôte) est
+retiré, puis les parties variables (dates, adresses IP, PID, identifiants
+hexadécimaux, empreintes de clés, nombres, y compris suivis d'une unité ou
+inclus dans un nom composé comme 'session-42.scope') sont masquées. Les lignes
+de même gabarit forment un groupe qui conserve le nombre d'occurrences, les
+premier et dernier timestamps, les serveurs concernés et un exemple. Un groupe
+dont toutes les lignes ont le même message est une simple répétition :
+l'exemple est alors affiché tel quel.
+
+Le calcul se fait en une seule passe sur le flux fusionné : la mémoire dépend
+du nombre de gabarits distincts (borné par MAX_GROUPES), pas du nombre de lignes.
+"""
+
+from datetime import datetime
+import re
+
+MAX_GROUPES = 5000  # Gabarits distincts conservés ; au-delà, les lignes sont seulement comptées
+
+# Préfixe syslog : [<PRI>VERSION ]date hôte
+_PREFIXE = re.compile(
+    r"^(?:<\d+>\d+ )?(?:\d{4}-\d{2}-\d{2}T\S+|[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) \S+ "
+)
+
+# Classes de jetons variables, essayées dans l'ordre sur chaque partie contenant un chiffre
+_CLASSES = [
+    (re.compile(r"(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?"), "<IP>"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?"), "<DATE>"),
+    (re.compile(r"\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?"), "<HEURE>"),
+    (re.compile(r"[+-]?\d+(?:\.\d+)?"), "<NUM>"),
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<UUID>"),
+    (re.compile(r"0x[0-9a-fA-F]+|[0-9a-f]{8,}"), "<HEX>"),
+    (re.compile(r"[0-9a-fA-F]{0,4}(?::[0-9a-fA-F]{0,4}){2,7}"), "<IP>"),
+]
+# Nombre suivi d'une unité (ex. '12ms', '1000Mbps', '1.5GB') : seul le nombre est masqué
+_UNITE = re.compile(r"\d+(?:\.\d+)?(?=[A-Za-z]+$)")
+# Empreinte de clé (ex. 'SHA256:nThbg6kX...'), dont l'encodage base64 peut contenir '/'
+_EMPREINTE = re.compile(r"(SHA256|SHA1|MD5):[A-Za-z0-9+/=:]+")
+_PARTIE = re.compile(r"[\w.:+\-]*\d[\w.:+\-]*")  # Partie d'un jeton contenant un chiffre
+# Nombre isolé à l'intérieur d'une partie (ex. '42' dans 'session-42.scope'), hors 'sda1' ou 'x86_64'
+_NOMBRE_INTERNE = re.compile(r"(?<![\w.])\d+(?:\.\d+)*(?!\w)")
+_MOTS_PID = {"pid", "uid", "gid", "session"}  # Mots suivis d'un identifiant, sans casse (ex. 'Session 4821')
+_PREFIXES_PID = ("pid=", "uid=", "gid=")
+
+TAILLE_CACHE = 10000
+_constantes = set()  # Jetons déjà vus sans partie variable (ex. 'ssh2', 'eth0:', '(root)')
+
+
+def _masque_partie(m) -> str:
+    partie = m.group()
+    coeur = partie.rstrip(".:")  # Ponctuation finale conservée (ex. 'port 22.')
+    for motif, remplacement in _CLASSES:
+        if motif.fullmatch(coeur):
+            if remplacement == "<NUM>" and coeur.isdigit() and (
+                m.string[m.start() - 1:m.start()] == "[" or m.string[:m.start()].lower().endswith(_PREFIXES_PID)
+            ):
+                remplacement = "<PID>"
+            return remplacement + partie[len(coeur):]
+    unite = _UNITE.match(coeur)
+    if unite:
+        return "<NUM>" + partie[unite.end():]
+    # Nombres à l'intérieur d'un nom composé ('session-42.scope') ou entre parenthèses ('audit(1697630401.123:45)')
+    if "-" in coeur or m.string[m.start() - 1:m.start()] == "(" or m.string[m.end():m.end() + 1] == ")":
+        return _NOMBRE_INTERNE.sub("<NUM>", partie)
+    return partie
+
+
+def message(ligne: str) -> str:
+    """Renvoie la ligne sans son préfixe syslog (date et hôte), ou la ligne entière s'il est absent."""
+    prefixe = _PREFIXE.match(ligne)
+    return ligne[prefixe.end():] if prefixe else ligne
+
+
+def gabarit(texte: str) -> str:
+    """
+    Masque les parties variables d'un message (dates, IP, PID, identifiants, nombres).
+
+    Le message est découpé en mots : les mots purement alphabétiques et ceux déjà
+    vus sans partie variable sont conservés sans expression régulière, ce qui
+    évite de parcourir chaque ligne caractère par caractère avec chaque masque.
+
+    >>> gabarit("Started session-42.scope - Session 42 of User root.")
+    'Started session-<NUM>.scope - Session <PID> of User root.'
+    >>> gabarit("type=USER_LOGIN msg=audit(1697630401.123:45): pid=812 uid=0")
+    'type=USER_LOGIN msg=audit(<NUM>:<NUM>): pid=<PID> uid=<PID>'
+    """
+    jetons = texte.split(" ")
+    precedent = ""
+    for i, jeton in enumerate(jetons):
+        if jeton.isalpha() or jeton in _constantes:
+            precedent = jeton
+            continue
+        empreinte = _EMPREINTE.fullmatch(jeton)
+        masque = empreinte.group(1) + ":<EMPREINTE>" if empreinte else _PARTIE.sub(_masque_partie, jeton)
+        if masque == jeton:
+            if len(_constantes) < TAILLE_CACHE:
+                _constantes.add(jeton)
+        else:
+            if masque == "<NUM>" and precedent.lower() in _MOTS_PID:
+                masque = "<PID>"
+            jetons[i] = masque
+        precedent = jeton
+    return " ".join(jetons)
+
+
+class Groupe:
+    """Lignes de même gabarit."""
+
+    __slots__ = ("gabarit", "exemple", "nombre", "premier", "dernier", "serveurs", "identiques")
+
+    def __init__(self, gabarit: str, exemple: str, timestamp: datetime, server: str):
+        self.gabarit = gabarit
+        self.exemple = exemple  # Message de la première ligne du groupe
+        self.nombre = 1
+        self.premier = timestamp
+        self.dernier = timestamp
+        self.serveurs = {server}
+        self.identiques = True  # Toutes les lignes ont exactement le même message
+
+    @property
+    def texte(self) -> str:
+        """Texte affiché : le message lui-même pour une répétition exacte, le gabarit sinon."""
+        return self.exemple if self.identiques else self.gabarit
+
+
+class Regroupement:
+    """Regroupement incrémental d'un flux de LogRecord."""
+
+    def __init__(self, max_groupes: int = MAX_GROUPES):
+        self.max_groupes = max_groupes
+        self.groupes = {}  # gabarit -> Groupe
+        self.lignes = 0
+        self.hors_groupes = 0  # Lignes de gabarits nouveaux arrivés après MAX_GROUPES
+        self._par_message = {}  # message exact -> Groupe (raccourci des répétitions exactes)
+
+    def ajoute(self, record):
+        self.lignes += 1
+        texte = message(record.line)
+        # Répétition exacte d'un message déjà vu : pas de masquage
+        groupe = self._par_message.get(texte)
+        if groupe is None:
+            cle = gabarit(texte)
+            groupe = self.groupes.get(cle)
+            if groupe is None:
+                if len(self.groupes) >= self.max_groupes:
+                    self.hors_groupes += 1
+                    return
+                groupe = self.groupes[cle] = Groupe(cle, texte, record.timestamp, record.server)
+                self._par_message[texte] = groupe
+                return
+            if len(self._par_message) < 4 * self.max_groupes:
+                self._par_message[texte] = groupe
+        groupe.nombre += 1
+        if record.timestamp < groupe.premier:
+            groupe.premier = record.timestamp
+        elif record.timestamp > groupe.dernier:
+            groupe.dernier = record.timestamp
+        groupe.serveurs.add(record.server)
+        if groupe.identiques and texte != groupe.exemple:
+            groupe.identiques = False
+
+    def tries(self) -> list:
+        """Groupes du plus fréquent au moins fréquent (à fréquence égale, le plus ancien d'abord)."""
+        return sorted(self.groupes.values(), key=lambda groupe: (-groupe.nombre, groupe.premier))
+
+
+def regroupe(records, max_groupes: int = MAX_GROUPES) -> Regroupement:
+    """
+    Regroupe les lignes d'un flux en une seule passe.
+
+    :param records: Itérable de LogRecord (ex. fusionne(...))
+    :param max_groupes: Nombre maximum de gabarits distincts conservés
+    :return: Regroupement (groupes, nombre total de lignes, lignes hors groupes)
+    """
+    resultat = Regroupement(max_groupes)
+    ajoute = resultat.ajoute
+    for record in records:
+        ajoute(record)
+    return resultat
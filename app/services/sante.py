@@ -0,0 +1,198 @@
+"""
+Sondes de disponibilité des serveurs, exécutées par lot.
+
+Un cycle interroge tous les hôtes en même temps :
+- ICMP : un seul socket ICMP non privilégié (SOCK_DGRAM) envoie une requête
+  echo à chaque hôte puis attend toutes les réponses. Si le noyau refuse ce
+  type de socket (sysctl net.ipv4.ping_group_range), on se rabat sur la
+  commande ping, un processus par hôte, tous lancés en même temps ;
+- SSH : une connexion TCP non bloquante vers le port 22 de chaque hôte, toutes
+  surveillées par un unique sélecteur.
+
+Le coût d'un cycle ne dépend donc pas du nombre de serveurs, à la latence près.
+"""
+
+from typing import NamedTuple, Optional
+from subprocess import Popen, PIPE, DEVNULL, TimeoutExpired
+import errno
+import re
+import selectors
+import socket
+import struct
+import time
+from .fanout import get_executor
+
+PORT_SSH = 22
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+_TEMPS_PING = re.compile(r"time[=<]([\d.]+) ms")  # Temps de réponse dans la sortie de ping
+
+
+class EtatSante(NamedTuple):
+    """Résultat des sondes pour un hôte (temps de réponse en millisecondes, None si injoignable)."""
+    icmp_rtt: Optional[float]
+    ssh_rtt: Optional[float]
+
+
+def _somme_controle(donnees: bytes) -> int:
+    if len(donnees) % 2:
+        donnees += b"\0"
+    somme = sum(struct.unpack(f"!{len(donnees) // 2}H", donnees))
+    somme = (somme >> 16) + (somme & 0xFFFF)
+    somme += somme >> 16
+    return ~somme & 0xFFFF
+
+
+def _paquet_echo(sequence: int) -> bytes:
+    # L'identifiant est remplacé par le noyau (port du socket) pour les sockets ICMP non privilégiés
+    charge = struct.pack("!d", time.monotonic())
+    entete = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, 0, sequence)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, _somme_controle(entete + charge), 0, sequence) + charge
+
+
+def _ping_socket(ips: list, timeout: float) -> dict:
+    """Ping de tous les hôtes via un socket ICMP non privilégié. Lève PermissionError s'il est interdit."""
+    rtt = dict.fromkeys(ips)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    try:
+        sock.setblocking(False)
+        envois = {}
+        for sequence, ip in enumerate(ips):
+            try:
+                sock.sendto(_paquet_echo(sequence & 0xFFFF), (ip, 0))
+                envois[sequence & 0xFFFF] = (ip, time.monotonic())
+            except OSError:
+                pass  # Adresse invalide ou réseau inaccessible : hôte injoignable
+
+        selecteur = selectors.DefaultSelector()
+        selecteur.register(sock, selectors.EVENT_READ)
+        fin = time.monotonic() + timeout
+        attendus = len(envois)
+        try:
+            while attendus:
+                restant = fin - time.monotonic()
+                if restant <= 0 or not selecteur.select(restant):
+                    break
+                while True:
+                    try:
+                        donnees, (source, _) = sock.recvfrom(1024)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    if len(donnees) < 8 or donnees[0] != ICMP_ECHO_REPLY:
+                        continue
+                    envoi = envois.get(struct.unpack("!H", donnees[6:8])[0])
+                    if envoi is None or envoi[0] != source or rtt[source] is not None:
+                        continue
+                    rtt[source] = (time.monotonic() - envoi[1]) * 1000
+                    attendus -= 1
+        finally:
+            selecteur.close()
+    finally:
+        sock.close()
+    return rtt
+
+
+def _ping_commandes(ips: list, timeout: float) -> dict:
+    """
+    Ping de tous les hôtes via la commande ping, un processus par hôte lancés en même temps.
+
+    Aucun thread n'est nécessaire : les processus s'exécutent en parallèle et le
+    temps de réponse est lu dans leur sortie ('time=0.42 ms').
+    """
+    rtt = dict.fromkeys(ips)
+    processus = {}
+    for ip in ips:
+        try:
+            processus[ip] = Popen(["ping", "-c", "1", "-W", str(max(int(timeout), 1)), ip],
+                                  stdout=PIPE, stderr=DEVNULL, text=True)
+        except OSError:
+            pass  # Commande ping absente : hôte considéré injoignable
+    fin = time.monotonic() + timeout + 1
+    for ip, proc in processus.items():
+        try:
+            sortie, _ = proc.communicate(timeout=max(fin - time.monotonic(), 0))
+        except TimeoutExpired:
+            proc.kill()  # Une réponse déjà écrite reste lisible (délai épuisé par un hôte précédent)
+            sortie, _ = proc.communicate()
+        temps = _TEMPS_PING.search(sortie)
+        if proc.returncode == 0 and temps:
+            rtt[ip] = float(temps.group(1))
+    return rtt
+
+
+def ping_lot(ips: list, timeout: float = 2) -> dict:
+    """
+    Envoie un ping à tous les hôtes simultanément.
+
+    :param ips: Liste d'adresses IPv4
+    :param timeout: Attente maximale des réponses (secondes)
+    :return: {ip: temps de réponse en ms, ou None}
+    """
+    if not ips:
+        return {}
+    try:
+        return _ping_socket(ips, timeout)
+    except PermissionError:
+        # Sockets ICMP non privilégiés désactivés. ping_lot tourne lui-même dans le pool
+        # partagé (sonde_serveurs) : y soumettre une tâche par hôte pourrait l'épuiser et
+        # bloquer le cycle, d'où des processus ping lancés directement.
+        return _ping_commandes(ips, timeout)
+
+
+def tcp_lot(ips: list, port: int = PORT_SSH, timeout: float = 2) -> dict:
+    """
+    Ouvre une connexion TCP vers le port donné de tous les hôtes simultanément.
+
+    :param ips: Liste d'adresses IPv4
+    :param port: Port testé (SSH par défaut)
+    :param timeout: Attente maximale des connexions (secondes)
+    :return: {ip: temps d'établissement de la connexion en ms, ou None}
+    """
+    rtt = dict.fromkeys(ips)
+    selecteur = selectors.DefaultSelector()
+    debuts = {}
+    try:
+        for ip in ips:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            code = sock.connect_ex((ip, port))
+            if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                sock.close()
+                continue
+            debuts[sock] = (ip, time.monotonic())
+            selecteur.register(sock, selectors.EVENT_WRITE)
+
+        fin = time.monotonic() + timeout
+        while debuts:
+            restant = fin - time.monotonic()
+            if restant <= 0:
+                break
+            for cle, _ in selecteur.select(restant):
+                sock = cle.fileobj
+                ip, debut = debuts.pop(sock)
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    rtt[ip] = (time.monotonic() - debut) * 1000
+                selecteur.unregister(sock)
+                sock.close()
+    finally:
+        for sock in debuts:
+            sock.close()
+        selecteur.close()
+    return rtt
+
+
+def sonde_serveurs(ips: list, timeout: float = 2) -> dict:
+    """
+    Effectue un cycle complet de sondes (ICMP et port SSH) sur tous les hôtes.
+
+    :param ips: Liste d'adresses IPv4
+    :param timeout: Attente maximale de chaque type de sonde (secondes)
+    :return: {ip: EtatSante}
+    """
+    ips = list(dict.fromkeys(ips))
+    executor = get_executor()
+    # Les deux sondes attendent en parallèle : un cycle dure au plus `timeout`
+    icmp = executor.submit(ping_lot, ips, timeout)
+    ssh = tcp_lot(ips, PORT_SSH, timeout)
+    icmp = icmp.result()
+    return {ip: EtatSante(icmp[ip], ssh[ip]) for ip in ips}
@@ -2,7 +2,15 @@ from fabric import Connection
 import yaml
 import os
 from paramiko import ssh_exception
+from invoke.exceptions import CommandTimedOut
 from sys import stderr, exit
+from .ssh_pool import pool, PoolSature
+from .configuration import get_settings
+from .compression import verifie_mode, commande_compressee, iter_lignes_flux, TAILLE_BLOC
+from .fusion import borne_lignes
+from .metriques import observe_etape, compte_erreur, compte_octets, incremente
+from .disjoncteur import verifie_hote, signale_succes, signale_echec, libere_sonde, delais_pour, observe_duree
+import time
 
 def load_config(filename):
     """
@@ -15,14 +23,41 @@ def load_config(filename):
         return config
 
 
-def get_syslog(host:str, lines:int=100, config_path:str=None) -> tuple:
+def nouvelle_connexion(host: str, cfg, compression: str = "none", delais=None) -> Connection:
     """
-    Récupère les n dernières lignes du syslog d'un hôte distant via SSH.
+    Crée une connexion fabric (non ouverte) vers l'hôte avec les paramètres SSH de la configuration.
+
+    :param cfg: Settings
+    :param compression: Mode de compression de l'hôte ('ssh' active la compression du transport)
+    :param delais: Delais adaptés à l'hôte, timeouts de la configuration si None
+    """
+    return Connection(
+        host=host,
+        user=cfg.ssh_user,
+        connect_kwargs={
+            "key_filename": cfg.ssh_priv_key_path,
+            "timeout": delais.connexion if delais else cfg.ssh_connect_timeout,  # Timeout pour la connexion
+            "banner_timeout": delais.banniere if delais else cfg.ssh_banner_timeout,  # Timeout pour la bannière SSH
+            "auth_timeout": delais.authentification if delais else cfg.ssh_auth_timeout,  # Timeout pour l'authentification
+            "compress": compression == "ssh"  # Compression zlib du transport SSH
+        }
+    )
+
+
+def _execute(host:str, config_path:str, action) -> tuple:
+    """
+    Ouvre (ou réutilise) la connexion SSH vers l'hôte et y applique action(cnx, cfg, timeout).
+
+    Les erreurs de configuration et de connexion sont converties en message lisible.
+    Un hôte écarté par le disjoncteur renvoie immédiatement sa dernière erreur,
+    sans connexion ; les timeouts de connexion sont adaptés aux durées observées.
+    Une commande interrompue par son timeout n'est pas un échec de l'hôte.
 
+    :param action: Fonction (connexion fabric, Settings, timeout de la commande) -> (résultat, code)
+    :return: Tuple (résultat ou message d'erreur, code) où code vaut 0 en cas de succès
     """
 
     resultat = ""
-    cnx = None
 
     # Si config_path n'est pas fourni, utiliser PATH_CONFIG
     if config_path is None:
@@ -31,9 +66,9 @@ def get_syslog(host:str, lines:int=100, config_path:str=None) -> tuple:
             resultat = "ERREUR : La variable d'environnement 'PATH_CONFIG' n'est pas définie et aucun config_path n'a été fourni."
             return resultat, 1
 
-    # Chargement de la config
+    # Chargement de la config (parsée une seule fois tant que le fichier ne change pas)
     try:
-        cfg = load_config(config_path)
+        cfg = get_settings(config_path)
     except FileNotFoundError as e:
         resultat = f"Config non trouvée: {e}"
         return resultat, 1
@@ -41,54 +76,171 @@ def get_syslog(host:str, lines:int=100, config_path:str=None) -> tuple:
         resultat = f"Erreur config: {e}"
         return resultat, 1
 
-    # Connexion SSH et exécution
     try:
-        cnx = Connection(
-            host=host,
-            user=cfg['ssh_user'],
-            connect_kwargs={
-                "key_filename": cfg["ssh_priv_key_path"],
-                "timeout": 5,  # Timeout de 5 secondes pour la connexion
-                "banner_timeout": 5,  # Timeout pour la bannière SSH
-                "auth_timeout":5  # Timeout pour l'authentification
-            }
-        )
-
-        result = cnx.run(f"sudo tail -n {lines} /var/log/syslog", hide=True, timeout=8)
+        compression = verifie_mode(cfg.compression_pour(host))
+    except ValueError as e:
+        return f"Erreur config: {e}", 1
 
-        if result.failed:
-            resultat = f"Commande échouée (code {result.return_code}). Avez vous bien installé le script sur cette machine ?"
-            return resultat, 1
+    # Hôte en panne connue : dernière erreur renvoyée sans attendre les timeouts
+    decision = verifie_hote(host, cfg)
+    if not decision.autorise:
+        incremente("monitoring_disjoncteur_rejets_total", hote=host)
+        return decision.message, 1
+    delais = delais_pour(host, cfg)
 
-        return result.stdout, 0
+    # Connexion SSH (réutilisée depuis le pool si possible) et exécution
+    ouverture = []  # Date de création de la connexion si elle est ouverte par cet appel
+    connecte = False  # Connexion établie : un timeout vient alors de la commande
 
-    except TimeoutError as e:
+    def fabrique():
+        ouverture.append(time.perf_counter())
+        return nouvelle_connexion(host, cfg, compression, delais)
+
+    try:
+        debut = time.perf_counter()
+        with pool.connexion(host, fabrique) as cnx:
+            observe_etape("connexion", host, time.perf_counter() - debut)
+            if ouverture:
+                observe_duree(host, time.perf_counter() - ouverture[0])
+            connecte = True
+            debut = time.perf_counter()
+            resultat, code = action(cnx, cfg, delais.commande)
+            observe_etape("commande", host, time.perf_counter() - debut)
+            if code != 0:
+                compte_erreur(host, "CommandeEchouee")  # L'hôte a répondu : pas un échec pour le disjoncteur
+        signale_succes(host, cfg, decision)
+        return resultat, code
+
+    except PoolSature as e:
+        # Saturation locale : l'hôte n'est pas en cause, la sonde éventuellement prise est rendue
+        libere_sonde(host, cfg, decision)
+        return f"Impossible d'interroger {host}: {e}", 1
+
+    except (TimeoutError, CommandTimedOut) as e:
+        compte_erreur(host, type(e).__name__)
+        if connecte:
+            # Commande trop longue pour la charge demandée : l'hôte a répondu, pas un échec pour le disjoncteur
+            signale_succes(host, cfg, decision)
+            return f"Timeout de la commande sur {host}: pas de réponse complète en {delais.commande:g} s. Réduisez le nombre de lignes ou la période demandée.", 1
         resultat = f"Timeout lors de la connexion à {host}: impossible de se connecter dans les délais impartis. Vérifiez que le serveur est accessible."
-        return resultat, 1
 
     except ssh_exception.SSHException as e:
+        compte_erreur(host, type(e).__name__)
         if "timed out" in str(e).lower() or "timeout" in str(e).lower():
             resultat = f"Timeout lors de la connexion SSH à {host}: le serveur ne répond pas. Vérifiez qu'il est en ligne et accessible."
         else:
             resultat = f"Erreur SSH lors de la connexion à {host}: {e}"
-        return resultat, 1
 
     except ssh_exception.NoValidConnectionsError as e:
+        compte_erreur(host, type(e).__name__)
         resultat = f"Impossible de se connecter à {host}: aucune connexion valide trouvée. Est-elle en ligne ? Le port SSH est-il accessible ?"
-        return resultat, 1
 
     except ssh_exception.AuthenticationException as e:
+        compte_erreur(host, type(e).__name__)
         resultat = f"Échec d'authentification sur {host}: {e}. Avez vous bien installé le script sur cette machine ?"
-        return resultat, 1
 
     except Exception as e:
+        compte_erreur(host, type(e).__name__)
         resultat = f"Erreur inattendue lors de la connexion à {host}: {e}"
-        return resultat, 1
 
-    finally:
-        # Fermer la connexion
-        if cnx:
-            try:
-                cnx.close()
-            except:
-                pass
\ No newline at end of file
+    signale_echec(host, cfg, resultat)
+    return resultat, 1
+
+
+def _echec(code) -> tuple:
+    return f"Commande échouée (code {code}). Avez vous bien installé le script sur cette machine ?", 1
+
+
+def execute_commande(host:str, commande:str, config_path:str=None) -> tuple:
+    """
+    Exécute une commande sur un hôte distant via SSH et renvoie sa sortie standard.
+
+    :param host: IP ou nom de l'hôte
+    :param commande: Commande à exécuter (doit être autorisée par le filtre installé par setup_client.sh)
+    :param config_path: Chemin du fichier de configuration, PATH_CONFIG par défaut
+    :return: Tuple (sortie ou message d'erreur, code) où code vaut 0 en cas de succès
+    """
+    def action(cnx, cfg, timeout):
+        result = cnx.run(commande, hide=True, warn=True, timeout=timeout)
+        if result.failed:
+            return _echec(result.return_code)
+        incremente("monitoring_octets_recus_total", len(result.stdout), hote=host)
+        return result.stdout, 0
+
+    return _execute(host, config_path, action)
+
+
+def execute_commande_octets(host:str, commande:str, config_path:str=None) -> tuple:
+    """
+    Exécute une commande sur un hôte distant et renvoie sa sortie standard brute, sans la décoder.
+
+    Les positions calculées sur la sortie sont donc exactes en octets, quels que
+    soient les caractères multi-octets qu'elle contient. Réservée aux sorties
+    courtes (ex. sondes de quelques Ko), la sortie étant conservée entière.
+
+    :param host: IP ou nom de l'hôte
+    :param commande: Commande à exécuter (doit être autorisée par le filtre installé par setup_client.sh)
+    :param config_path: Chemin du fichier de configuration, PATH_CONFIG par défaut
+    :return: Tuple (bytes, 0) ou (message d'erreur, 1)
+    """
+    def action(cnx, cfg, timeout):
+        canal = cnx.transport.open_session()
+        try:
+            canal.settimeout(timeout)
+            canal.exec_command(commande)
+            sortie = b"".join(compte_octets(iter(lambda: canal.recv(TAILLE_BLOC), b""), host))
+            code = canal.recv_exit_status()
+        finally:
+            canal.close()
+        if code != 0:
+            return _echec(code)
+        return sortie, 0
+
+    return _execute(host, config_path, action)
+
+
+def execute_commande_lignes(host:str, commande:str, config_path:str=None) -> tuple:
+    """
+    Exécute une commande sur un hôte distant et renvoie sa sortie découpée en lignes.
+
+    La sortie est lue bloc par bloc sur le canal SSH (et décompressée si 'gzip' ou
+    'zstd' est configuré pour l'hôte). Seules les lignes les plus récentes tenant
+    dans le budget 'max_octets_hote' sont conservées : une réponse démesurée ne
+    peut pas épuiser la mémoire du worker.
+
+    :param host: IP ou nom de l'hôte
+    :param commande: Commande à exécuter (sa forme compressée doit être autorisée par le filtre)
+    :param config_path: Chemin du fichier de configuration, PATH_CONFIG par défaut
+    :return: Tuple (Lignes, 0) ou (message d'erreur, 1)
+    """
+    def action(cnx, cfg, timeout):
+        mode = cfg.compression_pour(host)
+        if mode in ("gzip", "zstd"):
+            commande_hote = commande_compressee(commande, mode)
+        else:
+            commande_hote = commande
+
+        canal = cnx.transport.open_session()
+        try:
+            canal.settimeout(timeout)
+            canal.exec_command(commande_hote)
+            blocs = compte_octets(iter(lambda: canal.recv(TAILLE_BLOC), b""), host)
+            lignes = borne_lignes(iter_lignes_flux(blocs, mode), cfg.max_octets_hote)
+            code = canal.recv_exit_status()
+        finally:
+            canal.close()
+        if code != 0:
+            return _echec(code)
+        incremente("monitoring_lignes_recues_total", len(lignes), hote=host)
+        return lignes, 0
+
+    return _execute(host, config_path, action)
+
+
+def get_syslog(host:str, lines:int=100, config_path:str=None) -> tuple:
+    """
+    Récupère les n dernières lignes du syslog d'un hôte distant via SSH.
+
+    :return: Tuple (Lignes, 0) ou (message d'erreur, 1)
+    """
+    return execute_commande_lignes(host, f"sudo tail -n {int(lines)} /var/log/syslog", config_path)
@@ -0,0 +1,166 @@
+"""
+Pool de connexions SSH persistantes, partagé par tout le processus.
+
+Les connexions authentifiées sont conservées par hôte et réutilisées d'une
+requête à l'autre, ce qui évite de refaire la poignée de main TCP, l'échange
+de clés et l'authentification à chaque chargement de logs.
+"""
+
+from contextlib import contextmanager
+from threading import Condition
+import time
+
+MAX_SESSIONS = 32  # Nombre maximum de connexions ouvertes (actives + inactives)
+MAX_IDLE = 300  # Durée (secondes) au-delà de laquelle une connexion inactive est fermée
+KEEPALIVE = 30  # Intervalle (secondes) des paquets keepalive SSH
+ACQUIRE_TIMEOUT = 5  # Attente maximale (secondes) d'une place libre dans le pool
+
+
+class PoolSature(TimeoutError):
+    """Aucune place libre dans le pool : l'hôte n'est pas en cause."""
+
+
+class SSHPool:
+    """Pool de connexions fabric indexé par hôte."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_idle: float = MAX_IDLE, keepalive: int = KEEPALIVE):
+        self.max_sessions = max_sessions
+        self.max_idle = max_idle
+        self.keepalive = keepalive
+        self._cond = Condition()
+        self._idle = {}  # host -> [(connexion, date de dernière utilisation), ...]
+        self._generation = {}  # host -> compteur incrémenté à chaque éviction
+        self._ouvertes = 0
+
+    @staticmethod
+    def _saine(cnx) -> bool:
+        """Vérifie qu'une connexion est toujours utilisable avant de la réutiliser."""
+        try:
+            if not cnx.is_connected:
+                return False
+            cnx.transport.send_ignore()  # Lève une exception si la socket est morte
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _ferme(connexions):
+        for cnx in connexions:
+            try:
+                cnx.close()
+            except Exception:
+                pass
+
+    def _purge_expirees(self) -> list:
+        """Retire les connexions inactives depuis trop longtemps. Doit être appelé sous verrou."""
+        limite = time.monotonic() - self.max_idle
+        expirees = []
+        for host, entrees in self._idle.items():
+            gardees = [(cnx, date) for cnx, date in entrees if date >= limite]
+            expirees.extend(cnx for cnx, date in entrees if date < limite)
+            self._idle[host] = gardees
+        self._ouvertes -= len(expirees)
+        return expirees
+
+    def _libere_plus_ancienne(self) -> list:
+        """Ferme la connexion inactive la plus ancienne, tous hôtes confondus. Doit être appelé sous verrou."""
+        candidat = None
+        for host, entrees in self._idle.items():
+            if entrees and (candidat is None or entrees[0][1] < candidat[1]):
+                candidat = (host, entrees[0][1])
+        if candidat is None:
+            return []
+        cnx, _ = self._idle[candidat[0]].pop(0)
+        self._ouvertes -= 1
+        return [cnx]
+
+    def _acquiert(self, host: str, fabrique, attente: float):
+        a_fermer = []
+        fin = time.monotonic() + attente
+        cnx = None
+
+        with self._cond:
+            a_fermer.extend(self._purge_expirees())
+            while True:
+                entrees = self._idle.get(host)
+                if entrees:
+                    cnx, _ = entrees.pop()  # La plus récente, donc la plus susceptible d'être vivante
+                    break
+                if self._ouvertes < self.max_sessions:
+                    self._ouvertes += 1
+                    break
+                liberees = self._libere_plus_ancienne()
+                if liberees:
+                    a_fermer.extend(liberees)
+                    continue
+                restant = fin - time.monotonic()
+                if restant <= 0:
+                    raise PoolSature(f"Trop de sessions SSH ouvertes ({self.max_sessions}), réessayez plus tard.")
+                self._cond.wait(restant)
+            generation = self._generation.get(host, 0)
+
+        self._ferme(a_fermer)
+
+        if cnx is not None:
+            if self._saine(cnx):
+                return cnx, generation
+            # Connexion morte : on la remplace par une nouvelle sans rendre la place
+            self._ferme([cnx])
+
+        try:
+            cnx = fabrique()
+            cnx.open()
+            cnx.transport.set_keepalive(self.keepalive)
+        except BaseException:
+            with self._cond:
+                self._ouvertes -= 1
+                self._cond.notify()
+            raise
+        return cnx, generation
+
+    def _rend(self, host: str, cnx, generation: int, reutilisable: bool):
+        with self._cond:
+            if reutilisable and generation == self._generation.get(host, 0):
+                self._idle.setdefault(host, []).append((cnx, time.monotonic()))
+                self._cond.notify()
+                return
+            self._ouvertes -= 1
+            self._cond.notify()
+        self._ferme([cnx])
+
+    @contextmanager
+    def connexion(self, host: str, fabrique, attente: float = ACQUIRE_TIMEOUT):
+        """
+        Emprunte une connexion vers l'hôte, ouverte par `fabrique` si aucune n'est disponible.
+
+        La connexion est rendue au pool en sortie du bloc, ou fermée si une exception a été levée.
+
+        :param host: IP ou nom de l'hôte
+        :param fabrique: Fonction sans argument renvoyant une fabric.Connection non ouverte
+        :param attente: Attente maximale d'une place libre dans le pool
+        """
+        cnx, generation = self._acquiert(host, fabrique, attente)
+        reutilisable = False
+        try:
+            yield cnx
+            reutilisable = True
+        finally:
+            self._rend(host, cnx, generation, reutilisable)
+
+    def evince(self, host: str):
+        """Ferme les connexions inactives vers l'hôte et invalide celles en cours d'utilisation."""
+        with self._cond:
+            self._generation[host] = self._generation.get(host, 0) + 1
+            entrees = self._idle.pop(host, [])
+            self._ouvertes -= len(entrees)
+            self._cond.notify_all()
+        self._ferme(cnx for cnx, _ in entrees)
+
+
+pool = SSHPool()
+
+
+def evince_hote(host: str):
+    """Retire l'hôte du pool de connexions SSH (changement d'IP, suppression)."""
+    if host:
+        pool.evince(host)
@@ -0,0 +1,53 @@
+"""
+Microbenchmark de l'analyse des timestamps : ancienne extract_timestamp
+(split de toute la ligne + fromisoformat) contre horodatage.parse_lignes.
+
+Usage : python benchmarks/bench_horodatage.py [nombre_de_lignes]
+"""
+
+import sys
+import time
+
+from commun import prepare_environnement
+from generateur import genere_lignes
+
+prepare_environnement()
+
+from app.services.fusion import extract_timestamp  # noqa: E402
+from app.services.horodatage import parse_lignes  # noqa: E402
+
+
+def mesure(nom: str, fonction, lignes: list, repetitions: int = 3) -> float:
+    """Renvoie le meilleur débit (lignes/s) sur plusieurs répétitions."""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction(lignes)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    debit = len(lignes) / meilleur
+    print(f"  {nom:<32} {debit:>14,.0f} lignes/s")
+    return debit
+
+
+def ancien(lignes):
+    for ligne in lignes:
+        extract_timestamp(ligne)
+
+
+def nouveau(lignes):
+    for _ in parse_lignes(lignes):
+        pass
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    for fmt in ("iso", "rfc3164"):
+        lignes = genere_lignes(n, fmt)
+        print(f"Format {fmt} ({n} lignes) :")
+        a = mesure("extract_timestamp (ancien)", ancien, lignes)
+        b = mesure("horodatage.parse_lignes", nouveau, lignes)
+        print(f"  accélération : x{b / a:.1f}" + ("  (l'ancien renvoie datetime.min)" if fmt == "rfc3164" else ""))
+
+
+if __name__ == '__main__':
+    main()
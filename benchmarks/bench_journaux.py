@@ -0,0 +1,139 @@
+"""
+Benchmark de bout en bout du chargement des journaux, sur de faux hôtes SSH locaux.
+
+Mesure, pour N hôtes x M lignes, la durée de chaque étape du chargement :
+- fetch : récupération parallèle des logs par SSH (get_syslog + fan-out) ;
+- parse : analyse des timestamps (iter_records), par hôte ;
+- merge : fusion chronologique (fusionne) ;
+- render : rendu des lignes pour la page (lots JSON du défilement virtuel, macro
+  lots_lignes de _macros.html utilisée par journaux.html).
+
+Le résultat (p50/p99 en millisecondes et débit en lignes/s) est écrit en JSON
+pour pouvoir suivre les régressions d'une version à l'autre.
+
+Usage : python benchmarks/bench_journaux.py --hotes 8 --lignes 5000 [--latence 0.05] [--echecs 0.1]
+                                             [--format iso] [--compression none] [--sortie resultat.json]
+"""
+
+from datetime import datetime
+from functools import partial
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from commun import prepare_environnement, RACINE
+from generateur import genere_lignes, FORMATS
+from faux_ssh import FauxHote, genere_cle_client
+
+
+def centile(valeurs: list, p: float) -> float:
+    """Centile par rang le plus proche."""
+    valeurs = sorted(valeurs)
+    rang = max(int(round(p / 100 * len(valeurs) + 0.5)) - 1, 0)
+    return valeurs[min(rang, len(valeurs) - 1)]
+
+
+def resume(durees: list, lignes: int) -> dict:
+    """Statistiques d'une étape à partir de ses durées (secondes) et du nombre de lignes traitées à chaque mesure."""
+    return {
+        "p50_ms": round(centile(durees, 50) * 1000, 3),
+        "p99_ms": round(centile(durees, 99) * 1000, 3),
+        "debit_lignes_s": round(lignes / centile(durees, 50)) if centile(durees, 50) else None,
+        "mesures": len(durees),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hotes", type=int, default=4, help="Nombre de faux hôtes SSH")
+    parser.add_argument("--lignes", type=int, default=5000, help="Lignes demandées par hôte")
+    parser.add_argument("--repetitions", type=int, default=10, help="Nombre de chargements mesurés")
+    parser.add_argument("--latence", type=float, default=0, help="Latence injectée par commande (secondes)")
+    parser.add_argument("--echecs", type=float, default=0, help="Probabilité d'échec d'une commande (0 à 1)")
+    parser.add_argument("--format", choices=FORMATS, default="iso", help="Format des timestamps générés")
+    parser.add_argument("--longueur", type=int, default=0, help="Longueur minimale des messages")
+    parser.add_argument("--debit", type=float, default=20, help="Lignes par seconde dans le syslog simulé")
+    parser.add_argument("--compression", choices=("none", "gzip"), default="none", help="Compression du transfert")
+    parser.add_argument("--sortie", help="Fichier JSON de résultat (sortie standard par défaut)")
+    args = parser.parse_args()
+
+    repertoire = tempfile.mkdtemp(prefix="bench_journaux_")
+    cle = os.path.join(repertoire, "id_rsa")
+    genere_cle_client(cle)
+    prepare_environnement(
+        ssh_user="bench", ssh_priv_key_path=cle, cache_ttl=0, compression=args.compression,
+        max_lignes_requete=max(args.hotes * args.lignes, 1), max_octets_hote=0
+    )
+
+    from app.services import execute_en_parallele, get_syslog, iter_records, fusionne  # noqa: E402
+    from app.routes.journaux import lots_json  # noqa: E402
+    from jinja2 import Environment, FileSystemLoader  # noqa: E402
+
+    env = Environment(loader=FileSystemLoader(os.path.join(RACINE, "app", "templates")), autoescape=True)
+    env.globals["lots_json"] = lots_json  # Fonction globale des templates de l'application
+    gabarit = env.from_string(
+        "{% from '_macros.html' import lots_lignes %}{{ lots_lignes(logs, 'vueJournaux.ajoute') }}"
+    )
+
+    hotes = {
+        f"hote{i}": FauxHote(
+            genere_lignes(args.lignes, args.format, args.debit, args.longueur, hote=f"hote{i}", graine=i),
+            latence=args.latence, echecs=args.echecs
+        )
+        for i in range(args.hotes)
+    }
+    total = args.hotes * args.lignes
+    durees = {"fetch": [], "parse": [], "merge": [], "render": []}
+    erreurs = 0
+
+    # Un premier chargement non mesuré ouvre les connexions du pool SSH
+    execute_en_parallele({nom: partial(get_syslog, hote.adresse, args.lignes) for nom, hote in hotes.items()})
+
+    for _ in range(args.repetitions):
+        appels = {nom: partial(get_syslog, hote.adresse, args.lignes) for nom, hote in hotes.items()}
+        debut = time.perf_counter()
+        resultats, echecs = execute_en_parallele(appels)
+        durees["fetch"].append(time.perf_counter() - debut)
+        erreurs += len(echecs)
+
+        flux = []
+        for nom, lignes in resultats.items():
+            debut = time.perf_counter()
+            flux.append(list(iter_records(nom, lignes)))
+            durees["parse"].append(time.perf_counter() - debut)
+
+        debut = time.perf_counter()
+        fusion = list(fusionne([iter(records) for records in flux]))
+        durees["merge"].append(time.perf_counter() - debut)
+
+        debut = time.perf_counter()
+        gabarit.render(logs=fusion)
+        durees["render"].append(time.perf_counter() - debut)
+
+    for hote in hotes.values():
+        hote.arrete()
+
+    rapport = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "parametres": vars(args),
+        "etapes": {
+            "fetch": resume(durees["fetch"], total),
+            "parse": resume(durees["parse"], args.lignes),
+            "merge": resume(durees["merge"], total),
+            "render": resume(durees["render"], total),
+        },
+        "erreurs": erreurs,
+    }
+    texte = json.dumps(rapport, indent=2, ensure_ascii=False)
+    if args.sortie:
+        with open(args.sortie, "w") as fichier:
+            fichier.write(texte + "\n")
+    print(texte)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Utilitaires communs aux benchmarks.
+
+Les modules de l'application importent config.py, qui exige PATH_CONFIG : on
+fournit un fichier de configuration temporaire si la variable n'est pas définie.
+"""
+
+import os
+import sys
+import tempfile
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def prepare_environnement(ssh_user: str = "bench", ssh_priv_key_path: str = "/dev/null", **options) -> str:
+    """
+    Prépare l'import de l'application hors de tout déploiement.
+
+    :return: Chemin du fichier de configuration utilisé
+    """
+    if RACINE not in sys.path:
+        sys.path.insert(0, RACINE)
+
+    if os.environ.get('PATH_CONFIG') and not options:
+        return os.environ['PATH_CONFIG']
+
+    fd, chemin = tempfile.mkstemp(prefix="bench_config_", suffix=".yaml")
+    with os.fdopen(fd, "w") as fichier:
+        fichier.write('mariadb_logs_user_password: "bench"\n')
+        fichier.write(f'ssh_user: "{ssh_user}"\n')
+        fichier.write(f'ssh_priv_key_path: "{ssh_priv_key_path}"\n')
+        for cle, valeur in options.items():
+            fichier.write(f"{cle}: {valeur}\n")
+    os.environ['PATH_CONFIG'] = chemin
+    return chemin
@@ -0,0 +1,126 @@
+"""
+Faux serveurs SSH locaux (Paramiko) servant un syslog synthétique.
+
+Chaque faux hôte écoute sur un port de 127.0.0.1, accepte n'importe quelle
+clé publique et répond aux commandes utilisées par l'application
+('sudo tail -n N /var/log/syslog', 'stat' et 'sudo tail -c +N ... | head -c M',
+éventuellement suivies de '| gzip -c').
+Une latence et un taux d'échec peuvent être injectés pour simuler des hôtes
+lents ou instables.
+"""
+
+import gzip
+import random
+import re
+import socket
+import threading
+import time
+
+import paramiko
+
+# Paramiko envoie l'acquittement de la commande après check_channel_exec_request :
+# répondre avant ferait voir au client un canal déjà fermé
+DELAI_MIN = 0.005
+
+_re_tail = re.compile(r"^sudo tail -n (\d+) /var/log/syslog( \| gzip -c)?$")
+_re_octets = re.compile(r"^sudo tail -c \+(\d+) /var/log/syslog \| head -c (\d+)( \| gzip -c)?$")
+STAT = "stat -c %i:%s /var/log/syslog"
+
+
+class _Interface(paramiko.ServerInterface):
+    def __init__(self, hote: "FauxHote"):
+        self.hote = hote
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_REQUEST
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.hote.execute, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+class FauxHote:
+    """Faux serveur SSH servant les lignes données."""
+
+    def __init__(self, lignes: list, latence: float = 0, echecs: float = 0, cle_hote=None):
+        """
+        :param lignes: Contenu du syslog simulé
+        :param latence: Délai (secondes) avant chaque réponse (au moins DELAI_MIN)
+        :param echecs: Probabilité (0 à 1) qu'une commande échoue
+        :param cle_hote: Clé d'hôte Paramiko (générée si absente)
+        """
+        self.lignes = lignes
+        self.contenu = ("\n".join(lignes) + "\n").encode() if lignes else b""
+        self.latence = latence
+        self.echecs = echecs
+        self.cle_hote = cle_hote or paramiko.RSAKey.generate(2048)
+        self.commandes = 0
+        self.octets_envoyes = 0
+        self._ecoute = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._ecoute.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._ecoute.bind(("127.0.0.1", 0))
+        self._ecoute.listen(64)
+        self.port = self._ecoute.getsockname()[1]
+        self._transports = []
+        threading.Thread(target=self._accepte, daemon=True).start()
+
+    @property
+    def adresse(self) -> str:
+        """Adresse à utiliser comme IP du serveur ('127.0.0.1:port')."""
+        return f"127.0.0.1:{self.port}"
+
+    def _accepte(self):
+        while True:
+            try:
+                client, _ = self._ecoute.accept()
+            except OSError:
+                return  # Socket d'écoute fermé
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.cle_hote)
+            transport.start_server(server=_Interface(self))
+            self._transports.append(transport)
+
+    def execute(self, canal, commande: str):
+        self.commandes += 1
+        try:
+            time.sleep(max(self.latence, DELAI_MIN))
+            tail = _re_tail.match(commande)
+            octets = _re_octets.match(commande)
+            if (tail is None and octets is None and commande != STAT) or random.random() < self.echecs:
+                canal.sendall_stderr(f"Commande non autorisee: {commande}\n".encode())
+                canal.send_exit_status(1)
+                return
+
+            if commande == STAT:
+                sortie, compresse = f"1:{len(self.contenu)}\n".encode(), False
+            elif octets:
+                debut = int(octets.group(1)) - 1
+                sortie, compresse = self.contenu[debut:debut + int(octets.group(2))], octets.group(3)
+            else:
+                n = int(tail.group(1))
+                sortie, compresse = ("\n".join(self.lignes[-n:]) + "\n").encode() if n else b"", tail.group(2)
+            if compresse:
+                sortie = gzip.compress(sortie, compresslevel=6)
+            self.octets_envoyes += len(sortie)
+            canal.sendall(sortie)
+            canal.send_exit_status(0)
+        finally:
+            canal.close()
+
+    def arrete(self):
+        self._ecoute.close()
+        for transport in self._transports:
+            transport.close()
+
+
+def genere_cle_client(chemin: str):
+    """Écrit une clé privée RSA jetable, utilisée comme ssh_priv_key_path."""
+    paramiko.RSAKey.generate(2048).write_private_key_file(chemin)
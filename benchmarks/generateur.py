@@ -0,0 +1,56 @@
+"""
+Générateur de syslog synthétique pour les benchmarks.
+
+Paramètres : débit (lignes par seconde, qui fixe l'écart entre deux
+timestamps), longueur moyenne des lignes et format du timestamp.
+"""
+
+from datetime import datetime, timedelta
+import random
+
+FORMATS = ("iso", "rfc3164", "rfc5424")
+
+MESSAGES = [
+    "systemd[1]: Started Session 42 of user root.",
+    "CRON[12345]: (root) CMD (command -v debian-sa1 > /dev/null && debian-sa1 1 1)",
+    "sshd[2211]: Accepted publickey for monitoring_user from 192.168.122.1 port 51122 ssh2",
+    "kernel: [12345.678901] audit: type=1400 audit(1697630401.123:45): apparmor=\"STATUS\"",
+]
+
+
+def prefixe(dt: datetime, fmt: str) -> str:
+    """Timestamp de tête de ligne au format demandé."""
+    if fmt == "iso":
+        return dt.strftime("%Y-%m-%dT%H:%M:%S.%f") + "+02:00"
+    if fmt == "rfc5424":
+        return "<34>1 " + dt.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    return dt.strftime("%b %e %H:%M:%S")
+
+
+def genere_lignes(n: int, fmt: str = "iso", debit: float = 20, longueur: int = 0,
+                  hote: str = "hote1", debut: datetime = None, graine: int = None) -> list:
+    """
+    Génère n lignes de syslog triées dans le temps.
+
+    :param n: Nombre de lignes
+    :param fmt: Format du timestamp ('iso', 'rfc3164' ou 'rfc5424')
+    :param debit: Nombre de lignes par seconde
+    :param longueur: Longueur minimale du message (complété par du texte), 0 pour les messages bruts
+    :param hote: Nom d'hôte écrit dans les lignes
+    :param debut: Date de la première ligne
+    :param graine: Graine aléatoire, pour des jeux de données reproductibles
+    :return: Liste de lignes sans retour à la ligne
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    alea = random.Random(graine)
+    debut = debut or datetime(2025, 10, 18, 3, 0, 0)
+    pas = 1_000_000 / debit  # Écart entre deux lignes, en microsecondes
+    lignes = []
+    for i in range(n):
+        message = alea.choice(MESSAGES)
+        if len(message) < longueur:
+            message += " " + "x" * (longueur - len(message) - 1)
+        dt = debut + timedelta(microseconds=int(i * pas))
+        lignes.append(f"{prefixe(dt, fmt)} {hote} {message}")
+    return lignes
@@ -0,0 +1,121 @@
+"""
+Collecteur de logs en arrière-plan.
+
+Interroge périodiquement tous les serveurs de la table 'servers' (uniquement les
+octets ajoutés depuis le passage précédent) et insère les lignes dans la table
+'log_lines'. La page des journaux peut ensuite lire cette base locale sans
+aucune connexion SSH.
+
+Un second fil sonde en parallèle la disponibilité de tous les serveurs (ping et
+port SSH) et enregistre le résultat dans la table 'server_status', affichée par
+les pages Serveurs et Journaux.
+
+Lancement : ./run_collector.sh (ou python collector.py)
+"""
+
+from app import create_app
+from app.extensions import db
+from app.models import get_all_servers, ajoute_lignes, get_derniers_timestamps, purge_lignes, maj_statuts
+from app.services import get_settings, get_nouvelles_lignes, execute_en_parallele, iter_records, sonde_serveurs, ecrit
+from datetime import datetime, timedelta
+from functools import partial
+from threading import Thread
+import time
+
+PURGE_INTERVALLE = 3600  # Période (secondes) de suppression des lignes expirées
+
+app = create_app()
+
+
+def collecte(derniers_ts: dict) -> None:
+    """
+    Effectue un passage de collecte sur tous les serveurs.
+
+    :param derniers_ts: {server_id: timestamp le plus récent stocké}, mis à jour sur place
+    """
+    settings = get_settings()
+    servers = get_all_servers()
+    appels = {
+        serv.id: partial(get_nouvelles_lignes, serv.ip, settings.collecte_lignes_initiales)
+        for serv in servers
+    }
+    noms = {serv.id: serv.name for serv in servers}
+
+    resultats, erreurs = execute_en_parallele(appels)
+
+    for server_id, erreur in erreurs.items():
+        app.logger.warning("Collecte impossible sur %s : %s", noms[server_id], erreur)
+
+    for server_id, (lignes, relecture) in resultats.items():
+        dernier = derniers_ts.get(server_id, datetime.min)
+        records = iter_records(noms[server_id], lignes)
+        if relecture:
+            # Les relectures complètes (premier passage, rotation) peuvent renvoyer des lignes déjà stockées
+            records = [r for r in records if r.timestamp > dernier]
+        else:
+            # Lignes ajoutées depuis le passage précédent : toutes conservées, même à la même seconde
+            # que la dernière ligne stockée ou après un recul de l'horloge. Une suite de message en tête
+            # de lot reprend le timestamp de la dernière ligne stockée.
+            records = [
+                r._replace(timestamp=dernier) if r.timestamp == datetime.min and dernier != datetime.min else r
+                for r in records
+            ]
+        if records:
+            ajoute_lignes(server_id, records)
+            derniers_ts[server_id] = max(dernier, max(r.timestamp for r in records))
+            app.logger.info("%s : %d lignes collectées", noms[server_id], len(records))
+
+
+def sonde() -> None:
+    """Effectue un cycle de sondes de disponibilité sur tous les serveurs et l'enregistre."""
+    servers = get_all_servers()
+    etats = sonde_serveurs([serv.ip for serv in servers], get_settings().sante_timeout)
+    maj_statuts({serv.id: etats[serv.ip] for serv in servers})
+
+
+def boucle_sante() -> None:
+    """Sonde périodiquement les serveurs, indépendamment de la durée des collectes."""
+    with app.app_context():
+        while True:
+            debut = time.monotonic()
+            try:
+                sonde()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Erreur pendant les sondes de disponibilité")
+            finally:
+                db.session.remove()
+
+            time.sleep(max(get_settings().sante_intervalle - (time.monotonic() - debut), 1))
+
+
+def main():
+    Thread(target=boucle_sante, name="sante", daemon=True).start()
+
+    with app.app_context():
+        derniers_ts = get_derniers_timestamps()
+        prochaine_purge = 0
+
+        while True:
+            debut = time.monotonic()
+            settings = get_settings()
+
+            try:
+                collecte(derniers_ts)
+                if debut >= prochaine_purge:
+                    supprimees = purge_lignes(datetime.now() - timedelta(days=settings.retention_jours))
+                    app.logger.info("%d lignes expirées supprimées", supprimees)
+                    prochaine_purge = debut + PURGE_INTERVALLE
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Erreur pendant la collecte")
+            finally:
+                db.session.remove()
+                ecrit(force=True)  # Métriques SSH du collecteur, agrégées par /metrics
+
+            time.sleep(max(settings.collecte_intervalle - (time.monotonic() - debut), 1))
+
+
+if __name__ == '__main__':
+    app.logger.setLevel("INFO")
+    main()
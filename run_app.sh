@@ -30,13 +30,43 @@ echo "Utilisation du fichier de configuration : $PATH_CONFIG"
 VENV_PYTHON="/opt/monitoring_venv/bin/python"
 VENV_GUNICORN="/opt/monitoring_venv/bin/gunicorn"
 
-echo "Démarrage du serveur Gunicorn..."
+# Mode de service (variables facultatives, dans .env ou l'environnement) :
+#   gthread : GUNICORN_THREADS requêtes simultanées par worker (défaut)
+#   sync    : un worker = une requête à la fois (comportement historique) ; le suivi
+#             en direct y est refusé, une connexion ouverte bloquant le worker jusqu'au --timeout
+#   gevent  : workers coopératifs, GUNICORN_CONNECTIONS requêtes simultanées par worker.
+#             Les attentes réseau (SSH, ping, MariaDB) ne bloquent plus le worker.
+WORKER_CLASS="${GUNICORN_WORKER_CLASS:-gthread}"
+WORKERS="${GUNICORN_WORKERS:-2}"
+
+case "$WORKER_CLASS" in
+    sync)
+        OPTIONS_WORKER=()
+        ;;
+    gthread)
+        OPTIONS_WORKER=(--threads "${GUNICORN_THREADS:-8}")
+        ;;
+    gevent)
+        if ! "$VENV_PYTHON" -c "import gevent" 2>/dev/null; then
+            echo "ERREUR : Le mode gevent nécessite le paquet 'gevent' dans la venv."
+            echo "Solution : /opt/monitoring_venv/bin/pip install gevent"
+            exit 1
+        fi
+        OPTIONS_WORKER=(--worker-connections "${GUNICORN_CONNECTIONS:-1000}")
+        ;;
+    *)
+        echo "ERREUR : GUNICORN_WORKER_CLASS doit valoir gthread, sync ou gevent (valeur actuelle : '$WORKER_CLASS')."
+        exit 1
+        ;;
+esac
+
+echo "Démarrage du serveur Gunicorn ($WORKERS workers $WORKER_CLASS)..."
 exec "$VENV_GUNICORN" \
-    -w 2 \
+    -k "$WORKER_CLASS" \
+    -w "$WORKERS" \
+    "${OPTIONS_WORKER[@]}" \
     -b 0.0.0.0:5000 \
     --timeout 120 \
     --access-logfile - \
     --error-logfile - \
     'app:create_app()'
-
-    run_dev:app
\ No newline at end of file
@@ -0,0 +1,33 @@
+#!/bin/bash
+# run_collector.sh - Collecteur de logs en arrière-plan (à lancer à côté de run_app.sh)
+
+# Charger les variables d'environnement depuis .env
+if [ -f .env ]; then
+    echo "Chargement de la configuration depuis .env..."
+    export $(cat .env | grep -v '^#' | xargs)
+else
+    echo "AVERTISSEMENT : Fichier .env introuvable"
+    echo "Veuillez exécuter setup_database.sh pour le créer automatiquement"
+fi
+
+# Vérifier que PATH_CONFIG est défini
+if [ -z "$PATH_CONFIG" ]; then
+    echo "ERREUR : La variable PATH_CONFIG n'est pas définie."
+    echo "Solution : Exécutez setup_database.sh qui créera le fichier .env automatiquement"
+    exit 1
+fi
+
+# Vérifier que le fichier existe
+if [ ! -f "$PATH_CONFIG" ]; then
+    echo "ERREUR : Le fichier de configuration '$PATH_CONFIG' n'existe pas."
+    echo "Veuillez exécuter setup_database.sh pour créer ce fichier."
+    exit 1
+fi
+
+echo "Utilisation du fichier de configuration : $PATH_CONFIG"
+
+# Utilise la venv créé par setup_database.sh
+VENV_PYTHON="/opt/monitoring_venv/bin/python"
+
+echo "Démarrage du collecteur de logs..."
+exec "$VENV_PYTHON" collector.py
@@ -29,7 +29,7 @@ Exemple:
 Note:
     - Ce script doit être exécuté en tant que root
     - L'utilisateur créé aura des droits sudo restreints pour lire /var/log/syslog
-    - Seules certaines commandes SSH seront autorisées (echo test, ls, sudo tail)
+    - Seules certaines commandes SSH seront autorisées (echo test, ls, stat, sudo tail)
 
 EOF
     exit 1
@@ -84,7 +84,12 @@ fi
 # Configuration sudo
 log_info "Configuration de sudo..."
 mkdir -p /etc/sudoers.d  # -p crée le répertoire s'il n'existe pas déjà.
-echo "${USERNAME} ALL=(ALL) NOPASSWD: /usr/bin/tail -n * /var/log/syslog" > /etc/sudoers.d/${USERNAME}
+cat > /etc/sudoers.d/${USERNAME} << EOF
+${USERNAME} ALL=(ALL) NOPASSWD: /usr/bin/tail -n * /var/log/syslog
+${USERNAME} ALL=(ALL) NOPASSWD: /usr/bin/tail -c * /var/log/syslog
+${USERNAME} ALL=(ALL) NOPASSWD: /usr/bin/tail -n 0 -F /var/log/syslog
+${USERNAME} ALL=(ALL) NOPASSWD: /usr/bin/journalctl --no-pager --output=json *
+EOF
 chmod 0440 /etc/sudoers.d/${USERNAME}
 
 # Créer le script de filtre
@@ -94,6 +99,7 @@ cat > /usr/local/bin/filter_ssh_commands_${USERNAME}.py << 'EOF'
 import sys
 import os
 import re
+import subprocess
 
 original_command = os.environ.get('SSH_ORIGINAL_COMMAND')
 
@@ -101,17 +107,34 @@ if original_command is None:
     sys.stderr.write("Pas de commande SSH\n")
     sys.exit(1)
 
-allowed = ["echo test", "ls"]
-allowed_regex = [r"sudo tail -n .* /var/log/syslog"]
+allowed = ["echo test", "ls", "stat -c %i:%s /var/log/syslog"]
+allowed_regex = [
+    r"sudo tail -n .* /var/log/syslog",
+    r"^sudo tail -c \+\d+ /var/log/syslog \| head -c \d+( \| gzip -c| \| zstd -c -q)?$",  # Lecture incrémentale ou fenêtre de temps
+    r"^sudo tail -n \d+ /var/log/syslog \| (gzip -c|zstd -c -q)$",  # Transfert compressé
+    r"^sudo tail -n 0 -F /var/log/syslog$",  # Suivi en direct
+    # journald : filtres période / unité / priorité, sans caractère spécial du shell
+    r"^sudo journalctl --no-pager --output=json --output-fields=[\w,]+ -n \d+"
+    r"( --since '[\d: -]+'| --until '[\d: -]+'| -u [\w@.:-]+| -p [\w.]+| -f)*( \| gzip -c| \| zstd -c -q)?$",
+]
+
+
+def execute(commande):
+    """Exécute une commande autorisée et transmet son code de retour au serveur de monitoring."""
+    # pipefail : un échec de 'sudo tail' n'est pas masqué par le code de 'head', 'gzip' ou 'zstd'
+    code = subprocess.call(["/bin/bash", "-o", "pipefail", "-c", commande])
+    # 'head -c' ferme le tube dès qu'il a lu assez d'octets : 'tail' interrompu par SIGPIPE (141) n'est pas un échec
+    if code == 141 and "| head -c" in commande:
+        code = 0
+    sys.exit(code)
+
 
 if original_command in allowed:
-    os.system(original_command)
-    sys.exit(0)
+    execute(original_command)
 
 for elem in allowed_regex:
     if re.match(elem, original_command):
-        os.system(original_command)
-        sys.exit(0)
+        execute(original_command)
 
 sys.stderr.write(f"Commande non autorisee: {original_command}\n")
 sys.exit(1)
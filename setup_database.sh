@@ -106,6 +106,7 @@ log_info "Installation de Flask et extensions..."
 
 log_info "Installation de Gunicorn..."
 "$VENV_DIR/bin/pip" install --quiet "gunicorn"
+"$VENV_DIR/bin/pip" install --quiet "gevent"  # Workers asynchrones (GUNICORN_WORKER_CLASS=gevent)
 
 log_info "Installation de PyYAML..."
 "$VENV_DIR/bin/pip" install --quiet "pyyaml~=6.0.3"
@@ -117,6 +118,9 @@ log_info "Installation de Paramiko et Fabric2..."
 log_info "Installation de python-dotenv..."
 "$VENV_DIR/bin/pip" install --quiet "python-dotenv"
 
+log_info "Installation de zstandard (compression 'zstd' facultative)..."
+"$VENV_DIR/bin/pip" install --quiet "zstandard"
+
 log_info "Toutes les dépendances Python ont été installées"
 
 log_info "Génération du hash du mot de passe admin..."
@@ -167,6 +171,45 @@ CREATE TABLE IF NOT EXISTS servers (
     ip VARCHAR(45) NOT NULL,
     description TEXT
 );
+
+CREATE TABLE IF NOT EXISTS log_lines (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    server_id INT NOT NULL,
+    timestamp DATETIME(6) NOT NULL,
+    line TEXT NOT NULL,
+    INDEX ix_log_lines_server_ts (server_id, timestamp),
+    INDEX ix_log_lines_ts (timestamp, server_id, id),
+    FOREIGN KEY (server_id) REFERENCES servers(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS log_tokens (
+    token VARCHAR(64) COLLATE utf8mb4_bin NOT NULL,
+    line_id BIGINT NOT NULL,
+    PRIMARY KEY (token, line_id),
+    FOREIGN KEY (line_id) REFERENCES log_lines(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS server_status (
+    server_id INT PRIMARY KEY,
+    icmp_rtt DOUBLE NULL,
+    ssh_rtt DOUBLE NULL,
+    verifie_le DATETIME NOT NULL,
+    FOREIGN KEY (server_id) REFERENCES servers(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS servers_version (
+    id INT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
+INSERT IGNORE INTO servers_version (id, version) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS users_version (
+    id INT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
+INSERT IGNORE INTO users_version (id, version) VALUES (1, 0);
 EOF
 
 if mysql -u root < "$SQL_FILE" 2>&1; then  # 2>&1 redirige stderr vers stdout pour capturer les erreurs
@@ -325,6 +368,10 @@ cat > "$ENV_FILE" << ENVEOF
 
 # Chemin du fichier de configuration sécurisé
 PATH_CONFIG=$CONFIG_PATH
+
+# Mode des workers Gunicorn : gthread, sync ou gevent (voir README)
+GUNICORN_WORKER_CLASS=gthread
+GUNICORN_WORKERS=2
 ENVEOF
 
 # Permissions pour .env